@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# legacy - ed2/bench/legacy.py
+# edparse2: Pre-schema entry builders (benchmark baseline)
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+"""
+Frozen copies of the kanji & JMDict/JMnedict entry builders from edparser as they were
+before the schema extractor (ed2.common.xschema) replaced them; taken from the parse loops
+of parse_kanjidic() & parse_jmdict() in the baseline commit 36694f5. They are only used
+as the 'findall' baseline by the edbench extract benchmark, and are kept as-is (including
+the baseline's quirks, eg. JMnedict trans not being appended) so that the comparison stays
+meaningful; don't fix or update them
+"""
+
+from ed2.modules import edparser
+
+__all__ = [ 'legacy_kanji_entry', 'legacy_jmdict_entry' ]
+
+
+def legacy_kanji_entry(elem):
+    """
+    Reference implementation of edparser.kanji_entry() prior to the schema extractor
+    """
+    krdex = edparser.krdex
+    curEntry = {}
+
+    # kanji
+    curEntry['kanji'] = elem.find('literal').text
+
+    # code points
+    curEntry['codepoint'] = {}
+    for sv in elem.find('codepoint').findall('cp_value'):
+        curEntry['codepoint'][sv.attrib['cp_type']] = sv.text
+
+    # radicals
+    curEntry['radical'] = {}
+    for sv in elem.find('radical').findall('rad_value'):
+        curEntry['radical'][sv.attrib['rad_type']] = sv.text
+
+    ## misc
+    misc = elem.find('misc')
+
+    # grade/joyo level
+    # NEW: now returns an integer; for hyougaji kanji, this will be zero
+    if misc.find('grade') is not None:
+        curEntry['grade'] = int(misc.find('grade').text)
+    else:
+        curEntry['grade'] = 0
+
+    # stroke_count
+    # NEW: this will now *always* be an array of ints, whereas before it was
+    # a regular string *most* of the time, and an array of strings *sometimes*
+    curEntry['stroke_count'] = []
+    for sv in misc.findall('stroke_count'):
+        curEntry['stroke_count'].append(int(sv.text))
+
+    # freq
+    # NEW: this is now converted to an int;
+    # if it does not exist, it is null instead of an empty string
+    if misc.find('freq') is not None:
+        curEntry['freq'] = int(misc.find('freq').text)
+    else:
+        curEntry['freq'] = None
+
+    # jlpt
+    # NEW: if it does not exist, it is null instead of an empty string
+    if misc.find('jlpt') is not None:
+        curEntry['jlpt'] = int(misc.find('jlpt').text)
+    else:
+        curEntry['jlpt'] = None
+
+    # variant
+    # NEW: this field was not previously parsed by edparse
+    curEntry['variant'] = {}
+    for sv in misc.findall('variant'):
+        if curEntry['variant'].has_key(sv.attrib['var_type']):
+            curEntry['variant'][sv.attrib['var_type']].append(sv.text)
+        else:
+            curEntry['variant'][sv.attrib['var_type']] = [sv.text]
+
+    # xref
+    curEntry['xref'] = {}
+    if elem.find('dic_number') is not None:
+        for sv in elem.find('dic_number').findall('dic_ref'):
+            if sv.attrib['dr_type'] == "moro":
+                curEntry['xref'][sv.attrib['dr_type']] = "%02d:%04d/%s" % (int(sv.attrib.get('m_vol',0)), int(sv.attrib.get('m_page',0)), sv.text)
+            else:
+                curEntry['xref'][sv.attrib['dr_type']] = sv.text
+
+    # qcode
+    # NEW: now handles skip_misclass; types with multiple entries are coerced to lists
+    curEntry['qcode'] = {}
+    if elem.find('query_code') is not None:
+        for sv in elem.find('query_code').findall('q_code'):
+            if sv.attrib.has_key('skip_misclass'):
+                if not curEntry['qcode'].has_key('skip_misclass'):
+                    curEntry['qcode']['skip_misclass'] = []
+                curEntry['qcode']['skip_misclass'].append({ 'misclass': sv.attrib['skip_misclass'], 'skip': sv.text })
+            else:
+                if curEntry['qcode'].has_key(sv.attrib['qc_type']):
+                    # convert to list if we encounter another entry
+                    if curEntry['qcode'][sv.attrib['qc_type']] is not list:
+                        curEntry['qcode'][sv.attrib['qc_type']] = [curEntry['qcode'][sv.attrib['qc_type']]]
+                    curEntry['qcode'][sv.attrib['qc_type']].append(sv.text)
+                else:
+                    curEntry['qcode'][sv.attrib['qc_type']] = sv.text
+
+    ## reading & meaning & nanori
+    curEntry['reading'] = {}
+    curEntry['meaning'] = {}
+    if elem.find('reading_meaning') is not None:
+        # nanori
+        curEntry['reading']['nanori'] = []
+        for sv in elem.find('reading_meaning').findall('nanori'):
+            curEntry['reading']['nanori'].append(sv.text)
+
+        if elem.find('reading_meaning').find('rmgroup') is not None:
+            # reading
+            for sv in elem.find('reading_meaning').find('rmgroup').findall('reading'):
+                if not curEntry['reading'].has_key(sv.attrib['r_type']):
+                    curEntry['reading'][sv.attrib['r_type']] = []
+                curEntry['reading'][sv.attrib['r_type']].append(sv.text)
+
+            # meaning
+            for sv in elem.find('reading_meaning').find('rmgroup').findall('meaning'):
+                if sv.attrib.has_key('m_lang'):
+                    mlang = sv.attrib['m_lang']
+                else:
+                    mlang = 'en'
+                if not curEntry['meaning'].has_key(mlang):
+                    curEntry['meaning'][mlang] = []
+                curEntry['meaning'][mlang].append(sv.text)
+
+    # krad: crossref radicals
+    if krdex.has_key(curEntry['kanji']):
+        curEntry['krad'] = krdex[curEntry['kanji']]
+
+    # set _id for Mongo
+    curEntry['_id'] = curEntry['codepoint']['ucs']
+    return curEntry
+
+
+def legacy_jmdict_entry(elem,revEntList):
+    """
+    Reference implementation of edparser.jmdict_entry() prior to the schema extractor
+    """
+    curEntry = {}
+
+    # ent_seq
+    curEntry['ent_seq'] = elem.find('ent_seq').text
+
+    # set _id
+    curEntry['_id'] = curEntry['ent_seq']
+
+    ## k_ele
+    kf_pmax = 0
+    if elem.find('k_ele') is not None:
+        curEntry['k_ele'] = []
+        for sv in elem.findall('k_ele'):
+            kele = {}
+
+            # k_ele.keb
+            kele['keb'] = sv.find('keb').text
+
+            # k_ele.ke_inf
+            for ssv in sv.findall('ke_inf'):
+                if not kele.has_key('ke_inf'):
+                    kele['ke_inf'] = {}
+                kele['ke_inf'][revEntList[ssv.text]] = ssv.text
+
+            # k_ele.ke_pri
+            for ssv in sv.findall('ke_pri'):
+                if not kele.has_key('ke_pri'):
+                    kele['ke_pri'] = []
+                kele['ke_pri'].append(ssv.text)
+                kf_pmax += edparser.priodex[ssv.text]
+
+            curEntry['k_ele'].append(kele)
+
+    curEntry['kf_pmax'] = kf_pmax
+
+    ## r_ele
+    rf_pmax = 0
+    if elem.find('r_ele') is not None:
+        curEntry['r_ele'] = []
+        for sv in elem.findall('r_ele'):
+            rele = {}
+
+            # r_ele.reb
+            rele['reb'] = sv.find('reb').text
+
+            # r_ele.re_nokanji
+            if sv.find('re_nokanji') is not None:
+                rele['re_nokanji'] = True
+
+            # r_ele.restr
+            for ssv in sv.findall('re_restr'):
+                if not rele.has_key('re_restr'):
+                    rele['re_restr'] = []
+                rele['re_restr'].append(ssv.text)
+
+            # r_ele.re_inf
+            for ssv in sv.findall('re_inf'):
+                if not rele.has_key('re_inf'):
+                    rele['re_inf'] = {}
+                rele['re_inf'][revEntList[ssv.text]] = ssv.text
+
+            # r_ele.re_pri
+            for ssv in sv.findall('re_pri'):
+                if not rele.has_key('re_pri'):
+                    rele['re_pri'] = []
+                rele['re_pri'].append(ssv.text)
+                rf_pmax += edparser.priodex[ssv.text]
+
+            curEntry['r_ele'].append(rele)
+
+    curEntry['rf_pmax'] = rf_pmax
+
+    ## sense (JMDict)
+    if elem.find('sense') is not None:
+        curEntry['sense'] = []
+        for sv in elem.findall('sense'):
+            sen = {}
+
+            # sense.stagk
+            for ssv in sv.findall('stagk'):
+                if not sen.has_key('stagk'):
+                    sen['stagk'] = []
+                sen['stagk'].append(ssv.text)
+
+            # sense.stagr
+            for ssv in sv.findall('stagr'):
+                if not sen.has_key('stagr'):
+                    sen['stagr'] = []
+                sen['stagr'].append(ssv.text)
+
+            # sense.xref
+            for ssv in sv.findall('xref'):
+                if not sen.has_key('xref'):
+                    sen['xref'] = []
+                sen['xref'].append(ssv.text)
+
+            # sense.ant
+            for ssv in sv.findall('ant'):
+                if not sen.has_key('ant'):
+                    sen['ant'] = []
+                sen['ant'].append(ssv.text)
+
+            # sense.ant
+            for ssv in sv.findall('ant'):
+                if not sen.has_key('ant'):
+                    sen['ant'] = []
+                sen['ant'].append(ssv.text)
+
+            # sense.pos
+            for ssv in sv.findall('pos'):
+                if not sen.has_key('pos'):
+                    sen['pos'] = {}
+                sen['pos'][revEntList[ssv.text]] = ssv.text
+
+            # sense.field
+            for ssv in sv.findall('field'):
+                if not sen.has_key('field'):
+                    sen['field'] = {}
+                sen['field'][revEntList[ssv.text]] = ssv.text
+
+            # sense.misc
+            for ssv in sv.findall('misc'):
+                if not sen.has_key('misc'):
+                    sen['misc'] = {}
+                sen['misc'][revEntList[ssv.text]] = ssv.text
+
+            # sense.lsource
+            for ssv in sv.findall('lsource'):
+                if not sen.has_key('lsource'):
+                    sen['lsource'] = []
+                sen['lsource'].append(ssv.text)
+
+            # sense.dial
+            for ssv in sv.findall('dial'):
+                if not sen.has_key('dial'):
+                    sen['dial'] = []
+                sen['dial'].append(ssv.text)
+
+            # sense.gloss
+            if sv.find('gloss') is not None:
+                sen['gloss'] = {}
+                for ssv in sv.findall('gloss'):
+                    if len(ssv.attrib):
+                        mlang = ssv.attrib.values()[0]
+                    else:
+                        mlang = "eng"
+                    if not sen['gloss'].has_key(mlang):
+                        sen['gloss'][mlang] = []
+                    sen['gloss'][mlang].append(ssv.text)
+
+            # sense.example
+            for ssv in sv.findall('example'):
+                if not sen.has_key('example'):
+                    sen['example'] = []
+                sen['example'].append(ssv.text)
+
+            # sense.s_inf
+            for ssv in sv.findall('s_inf'):
+                if not sen.has_key('s_inf'):
+                    sen['s_inf'] = []
+                sen['s_inf'].append(ssv.text)
+
+            # sense.pri
+            for ssv in sv.findall('pri'):
+                if not sen.has_key('pri'):
+                    sen['pri'] = []
+                sen['pri'].append(ssv.text)
+
+            curEntry['sense'].append(sen)
+
+    ## trans (JMnedict)
+    if elem.find('trans') is not None:
+        curEntry['trans'] = []
+        for sv in elem.findall('trans'):
+            tran = {}
+
+            # trans.name_type
+            for ssv in sv.findall('name_type'):
+                if not tran.has_key('name_type'):
+                    tran['name_type'] = []
+                tran['name_type'].append(ssv.text)
+
+            # trans.xref
+            for ssv in sv.findall('xref'):
+                if not tran.has_key('xref'):
+                    tran['xref'] = []
+                tran['xref'].append(ssv.text)
+
+            # trans.trans_det
+            if sv.find('trans_det') is not None:
+                tran['trans_det'] = {}
+                for ssv in sv.findall('trans_det'):
+                    if len(ssv.attrib):
+                        mlang = ssv.attrib.values()[0]
+                    else:
+                        mlang = "eng"
+                    if not tran['trans_det'].has_key(mlang):
+                        tran['trans_det'][mlang] = []
+                    tran['trans_det'][mlang].append(ssv.text)
+    return curEntry
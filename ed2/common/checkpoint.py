@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# checkpoint - ed2/common/checkpoint.py
+# edparse2: Import progress checkpoints
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+import os
+import sys
+import json
+
+from ..common.logthis import *
+from ..common.pcache import file_fingerprint
+
+
+class Checkpoint(object):
+    """
+    Records the progress of an import in a JSON file, so that an interrupted import can
+    be resumed. The checkpoint holds the fingerprints of the source files, the parser
+    version and the target URI; if any of these differ on the next run, the checkpoint
+    is discarded and the import starts from the beginning
+
+    Progress is tracked per collection: collections which have been fully written are
+    listed in 'done', and for the collection currently being written, 'last' is the key
+    of the last entry known to be committed
+    """
+    fpath = None
+    ident = {}
+    state = {}
+
+    def __init__(self, fpath, srcfiles, version, target=None):
+        self.fpath = os.path.realpath(os.path.expanduser(fpath))
+        self.ident = { 'version': version, 'target': target, 'sources': [ file_fingerprint(x) for x in srcfiles ] }
+        self.state = { 'done': [], 'collection': None, 'last': None }
+
+        if os.path.exists(self.fpath):
+            try:
+                with open(self.fpath) as f:
+                    tdata = json.load(f)
+            except Exception as e:
+                logthis("Failed to read checkpoint file; ignoring --",suffix=e,loglevel=LL.WARNING)
+                tdata = {}
+            if tdata.get('ident') == self.ident:
+                self.state = tdata['state']
+                logthis(">> Resuming import from checkpoint:",suffix=self.describe(),loglevel=LL.INFO)
+            else:
+                logthis("Checkpoint does not match the current inputs; starting from the beginning",loglevel=LL.WARNING)
+
+    def done(self, name):
+        """return True if collection name has already been fully written"""
+        return name in self.state['done']
+
+    def last(self, name):
+        """return the key of the last committed entry for collection name, or None"""
+        if self.state['collection'] == name:
+            return self.state['last']
+        return None
+
+    def commit(self, name, key):
+        """record that all entries of collection name up to and including key are committed"""
+        self.state['collection'] = name
+        self.state['last'] = key
+        self.save()
+
+    def complete(self, name):
+        """record that collection name has been fully written"""
+        if name not in self.state['done']:
+            self.state['done'].append(name)
+        self.state['collection'] = None
+        self.state['last'] = None
+        self.save()
+
+    def save(self):
+        """write the checkpoint file; the old file is replaced atomically"""
+        tpath = self.fpath + '.tmp'
+        with open(tpath,'w') as f:
+            json.dump({ 'ident': self.ident, 'state': self.state }, f)
+        os.rename(tpath, self.fpath)
+
+    def finish(self):
+        """the import completed successfully; remove the checkpoint file"""
+        if os.path.exists(self.fpath):
+            os.unlink(self.fpath)
+        logthis("Import complete; removed checkpoint",suffix=self.fpath,loglevel=LL.VERBOSE)
+
+    def describe(self):
+        tdesc = "done: %s" % (', '.join(self.state['done']) or 'none')
+        if self.state['collection']:
+            tdesc += "; %s up to %s" % (self.state['collection'], self.state['last'])
+        return tdesc
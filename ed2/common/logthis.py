@@ -27,7 +27,6 @@ import os
 import sys
 import __main__
 import traceback
-import inspect
 import logging
 import logging.handlers
 import signal
@@ -126,12 +125,30 @@ class LL:
 # set default loglevel
 g_loglevel = LL.INFO
 
+# logfile loglevel; messages above this level are not written to the logfile
+g_filelevel = LL.DEBUG2
+
 # logfile handle
 loghand = None
 
 def logthis(logline,loglevel=LL.DEBUG,prefix=None,suffix=None,ccode=None):
+    """
+    write a log message to stdout and the logfile
+    logline, prefix and suffix may also be callables (eg. lambda: print_r(bigdict)), which
+    are only evaluated if the message is actually going to be written somewhere
+    """
     global g_loglevel
 
+    # fast path: bail out before doing any formatting or frame inspection
+    # if this message is not going to be written to stdout or the logfile
+    if loglevel > g_loglevel and (loghand is None or loglevel > g_filelevel):
+        return
+
+    # evaluate lazy message arguments
+    if callable(logline): logline = logline()
+    if callable(prefix): prefix = prefix()
+    if callable(suffix): suffix = suffix()
+
     zline = ''
     if not ccode:
         if loglevel == LL.ERROR: ccode = C.RED
@@ -142,20 +159,13 @@ def logthis(logline,loglevel=LL.DEBUG,prefix=None,suffix=None,ccode=None):
     zline += ccode + logline + C.OFF
     if suffix: zline += " " + C.CYN + unicode(suffix) + C.OFF
 
-    # get traceback info
-    lframe = inspect.stack()[1][0]
-    lfunc = inspect.stack()[1][3]
-    mod = inspect.getmodule(lframe)
-    lline = inspect.getlineno(lframe)
-    lfile = inspect.getsourcefile(lframe)
-    lfile = os.path.splitext(os.path.basename(lfile))[0]
-
-    if mod:
-        lmodname = str(mod.__name__)
-        xmessage = " "
-    else:
-        lmodname = str(__name__)
-        xmessage = str(data)
+    # get caller info
+    # sys._getframe() is used rather than inspect.stack(), since the latter
+    # reads the source file for every frame in the stack
+    lframe = sys._getframe(1)
+    lfunc = lframe.f_code.co_name
+    lline = lframe.f_lineno
+    lmodname = str(lframe.f_globals.get('__name__', __name__))
     if lmodname == "__main__":
         lmodname = "yc_cpx"
         lfunc = "(main)"
@@ -174,7 +184,8 @@ def logthis(logline,loglevel=LL.DEBUG,prefix=None,suffix=None,ccode=None):
         sys.stdout.write(finline)
 
     # write to logfile
-    writelog(finline)
+    if loglevel <= g_filelevel:
+        writelog(finline)
 
 def logexc(e,msg,prefix=None):
     """log exception"""
@@ -182,9 +193,11 @@ def logexc(e,msg,prefix=None):
     suffix = C.WHT + "[" + C.YEL + str(e.__class__.__name__) + C.WHT + "] " + C.YEL + unicode(e)
     logthis(msg,LL.ERROR,prefix,suffix)
 
-def openlog(fname="rainwatch.log"):
-    global loghand
+def openlog(fname="rainwatch.log",filelevel=None):
+    global loghand, g_filelevel
     prxname = os.path.basename(sys.argv[0])
+    if filelevel:
+        g_filelevel = int(filelevel)
     try:
         loghand = open(fname,'a')
         writelog("Logging started.\n")
@@ -211,8 +224,10 @@ def writelog(logmsg):
         loghand.write("[ %s ] %s" % (datetime.now().strftime("%d/%b/%Y %H:%M:%S.%f"),decolor(logmsg)))
         loghand.flush()
 
+decolor_rgx = re.compile('\033\[(3[0-9]m|1?m|4D|2J|K|0;0f)')
+
 def decolor(instr):
-    return re.sub('\033\[(3[0-9]m|1?m|4D|2J|K|0;0f)','',instr)
+    return decolor_rgx.sub('',instr)
 
 def loglevel(newlvl=None):
     global g_loglevel
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# ndjson - ed2/common/ndjson.py
+# edparse2: Newline-delimited JSON reader & writer
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+import os
+import sys
+import re
+import json
+import gzip
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from ..common.logthis import *
+
+# matches NDJSON paths; groups are (stem, extension, compression suffix)
+ndjson_rgx = re.compile(r'^(.*)\.(ndjson|jsonl)((?:\.gz|\.zst)?)$', re.I)
+
+
+def is_ndjson(fpath):
+    """return True if fpath has an NDJSON extension (.ndjson or .jsonl, optionally .gz or .zst)"""
+    return ndjson_rgx.match(fpath) is not None
+
+def ndjson_path(fpath, setname):
+    """
+    return the path of the NDJSON file for setname, based on fpath
+    eg. ('/data/edict.ndjson.gz', 'kanji') => '/data/edict.kanji.ndjson.gz'
+    """
+    stem,ext,comp = ndjson_rgx.match(fpath).groups()
+    return '%s.%s.%s%s' % (stem, setname, ext, comp)
+
+def ndjson_open(fpath, mode='rb'):
+    """
+    open fpath for reading or writing in binary mode ('rb' or 'wb'), with transparent
+    gzip or zstd (de)compression based on the file extension
+    """
+    if fpath.lower().endswith('.gz'):
+        return gzip.open(fpath, mode)
+    elif fpath.lower().endswith('.zst'):
+        if zstandard is None:
+            failwith(ER.DEPMISSING, "zstandard module is required for .zst files")
+        fh = open(fpath, mode)
+        if mode.startswith('w'):
+            return zstandard.ZstdCompressor().stream_writer(fh)
+        else:
+            return zstandard.ZstdDecompressor().stream_reader(fh)
+    else:
+        return open(fpath, mode)
+
+
+class NDJSONWriter(object):
+    """Write entries to an NDJSON file, one JSON object per line"""
+    fpath = None
+    fh = None
+    count = 0
+
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self.fh = ndjson_open(fpath, 'wb')
+        self.count = 0
+
+    def write(self, entry):
+        self.fh.write(json.dumps(entry, ensure_ascii=False, separators=(',',':')).encode('utf-8') + '\n')
+        self.count += 1
+
+    def close(self):
+        if self.fh:
+            self.fh.close()
+            self.fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, evalue, etb):
+        self.close()
+
+
+def read_ndjson(fpath, blocksize=1048576):
+    """
+    Generator; yield each entry from the NDJSON file fpath
+    The file is read incrementally, so only one block is held in memory at a time
+    """
+    fh = ndjson_open(fpath, 'rb')
+    try:
+        tbuf = ''
+        while True:
+            tblock = fh.read(blocksize)
+            if not tblock:
+                break
+            tlines = (tbuf + tblock).split('\n')
+            tbuf = tlines.pop()
+            for tline in tlines:
+                if tline:
+                    yield json.loads(tline)
+        if tbuf.strip():
+            yield json.loads(tbuf)
+    finally:
+        fh.close()
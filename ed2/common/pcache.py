@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# pcache - ed2/common/pcache.py
+# edparse2: On-disk cache for parsed entries
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+import os
+import sys
+import re
+import json
+import hashlib
+import cPickle
+
+from ..common.logthis import *
+
+
+def file_fingerprint(fpath, blocksize=1048576):
+    """
+    return a fingerprint dict for a source file: size, mtime and SHA-1 of its contents
+    """
+    fst = os.stat(fpath)
+    fsha = hashlib.sha1()
+    with open(fpath,'rb') as f:
+        while True:
+            tblock = f.read(blocksize)
+            if not tblock:
+                break
+            fsha.update(tblock)
+    return { 'file': os.path.basename(fpath), 'size': fst.st_size, 'mtime': int(fst.st_mtime), 'sha1': fsha.hexdigest() }
+
+
+class ParseCache(object):
+    """
+    Cache for parsed entries, stored in cachedir as a stream of pickled entries
+    Each cache file is keyed by the parser version, and the size/mtime/hash of each of
+    the source files used to produce it; if any of these change, the cache is invalidated
+    """
+    cachedir = None
+    version = None
+    stats = {}
+
+    def __init__(self, cachedir, version):
+        self.cachedir = os.path.realpath(os.path.expanduser(cachedir))
+        self.version = version
+        self.stats = {}
+        if not os.path.exists(self.cachedir):
+            os.makedirs(self.cachedir)
+
+    def key(self, name, srcfiles):
+        """return cache key for dataset name, produced from the list of srcfiles"""
+        fplist = [ file_fingerprint(x) for x in srcfiles ]
+        return hashlib.sha1(json.dumps([ self.version, name, fplist ], sort_keys=True)).hexdigest()
+
+    def path(self, name, ckey):
+        return os.path.join(self.cachedir, '%s-%s.pcache' % (name, ckey))
+
+    def lookup(self, name, srcfiles):
+        """
+        return (cpath, hit) for dataset name; cpath is the path of the cache file for the
+        current srcfiles, and hit is True if that cache file already exists
+        """
+        cpath = self.path(name, self.key(name, srcfiles))
+        if os.path.exists(cpath):
+            self.stats[name] = 'hit'
+            logthis("Parse cache hit:",prefix=name,suffix=cpath,loglevel=LL.VERBOSE)
+            return (cpath, True)
+        else:
+            self.stats[name] = 'miss'
+            logthis("Parse cache miss:",prefix=name,suffix=cpath,loglevel=LL.VERBOSE)
+            return (cpath, False)
+
+    def wrap(self, name, srcfiles, entries):
+        """
+        Generator; if a valid cache exists for dataset name, yield its entries; otherwise
+        yield from entries, while writing each to a new cache file. The cache file is only
+        committed once entries has been fully consumed
+        """
+        cpath,hit = self.lookup(name, srcfiles)
+        if hit:
+            tgen = self.load(cpath)
+        else:
+            tgen = self.write(name, cpath, entries)
+        for tentry in tgen:
+            yield tentry
+
+    def write(self, name, cpath, entries):
+        """
+        Generator; yield from entries, while writing each to cache file cpath
+        The cache file is only committed once entries has been fully consumed
+        """
+        tpath = cpath + '.%d.tmp' % (os.getpid())
+        try:
+            with open(tpath,'wb') as f:
+                cpk = cPickle.Pickler(f, cPickle.HIGHEST_PROTOCOL)
+                for tentry in entries:
+                    cpk.dump(tentry)
+                    cpk.clear_memo()
+                    yield tentry
+            self.invalidate(name)
+            os.rename(tpath, cpath)
+            logthis("Parse cache written:",prefix=name,suffix=cpath,loglevel=LL.VERBOSE)
+        finally:
+            if os.path.exists(tpath):
+                os.unlink(tpath)
+
+    def load(self, cpath):
+        """Generator; yield each entry from cache file cpath"""
+        with open(cpath,'rb') as f:
+            cup = cPickle.Unpickler(f)
+            while True:
+                try:
+                    yield cup.load()
+                except EOFError:
+                    break
+
+    def invalidate(self, name=None):
+        """remove cache files for dataset name, or all cache files if name is None"""
+        rcount = 0
+        for tf in os.listdir(self.cachedir):
+            if re.match(r'^(.+)-[0-9a-f]{40}\.pcache$', tf) and (name is None or tf.rsplit('-',1)[0] == name):
+                os.unlink(os.path.join(self.cachedir, tf))
+                rcount += 1
+        logthis("Removed %d cache files from" % (rcount),suffix=self.cachedir,loglevel=LL.VERBOSE)
+        return rcount
+
+    def report(self):
+        """log cache hit/miss for each dataset"""
+        for tname in sorted(self.stats):
+            logthis("** Parse cache %s:" % (self.stats[tname]),prefix=tname,suffix=self.cachedir,loglevel=LL.INFO)
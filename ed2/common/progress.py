@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# progress - ed2/common/progress.py
+# edparse2: Throughput & ETA reporting for long-running operations
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+import os
+import sys
+import json
+import time
+import gzip
+
+from ..common.logthis import *
+from ..common.util import fmtsize
+
+__all__ = [ 'Progress', 'progress_config' ]
+
+# seconds between progress reports (0 disables reporting)
+g_interval = 10.0
+# if set, the current stats of all active reporters are written here as JSON
+g_statsfile = None
+# name => stats dict of active reporters
+g_stats = {}
+
+
+def progress_config(interval=None, statsfile=None):
+    """set the global reporting interval (seconds) and stats file path"""
+    global g_interval, g_statsfile
+    if interval is not None:
+        g_interval = float(interval)
+    g_statsfile = statsfile or None
+
+
+class Progress(object):
+    """
+    Progress reporter; call update() once per item processed
+    Every interval seconds, logs items/sec, bytes/sec (if a byte count is available)
+    and an ETA (if a total is known), and updates the stats file, if configured
+
+    To keep update() cheap, the clock is only checked every 'stride' items; the stride
+    is adjusted after each check, so that the clock is read ~10 times per interval
+    """
+    name = None
+    total = None
+    totalbytes = None
+    count = 0
+    nbytes = 0
+    bytefunc = None
+    interval = None
+    loglevel = LL.INFO
+    tstart = None
+    tnext = None
+    stride = 1
+    nextcheck = 1
+
+    def __init__(self, name, total=None, totalbytes=None, interval=None, loglevel=LL.INFO):
+        self.name = name
+        self.total = total
+        self.totalbytes = totalbytes
+        self.interval = g_interval if interval is None else interval
+        self.loglevel = loglevel
+        self.count = 0
+        self.nbytes = 0
+        self.tstart = time.time()
+        self.tnext = self.tstart + self.interval
+        self.stride = 1
+        self.nextcheck = 1 if self.interval > 0 else sys.maxint
+
+    def track_file(self, fh, fpath):
+        """
+        use the read position of open file fh (for fpath) as the byte count; for gzip
+        files, the position in the compressed file is used, to match the file size
+        """
+        self.totalbytes = os.path.getsize(fpath)
+        if isinstance(fh, gzip.GzipFile):
+            self.bytefunc = fh.fileobj.tell
+        else:
+            self.bytefunc = fh.tell
+        return self
+
+    def update(self, n=1, nbytes=0):
+        """record n items (and nbytes bytes) processed"""
+        self.count += n
+        self.nbytes += nbytes
+        if self.count >= self.nextcheck:
+            self.check()
+
+    def check(self):
+        tnow = time.time()
+        if tnow >= self.tnext:
+            self.report(tnow)
+            self.tnext = tnow + self.interval
+        # aim for ~10 clock checks per interval at the current rate
+        telapsed = tnow - self.tstart
+        if telapsed > 0:
+            self.stride = max(1, int(self.count / telapsed * self.interval / 10))
+        self.nextcheck = self.count + self.stride
+
+    def stats(self, tnow=None):
+        """return a dict of the current stats"""
+        tnow = tnow or time.time()
+        telapsed = max(tnow - self.tstart, 1e-6)
+        tbytes = self.bytes()
+        tstats = {
+                    'name': self.name,
+                    'count': self.count,
+                    'total': self.total,
+                    'elapsed': telapsed,
+                    'rate': self.count / telapsed,
+                    'bytes': tbytes,
+                    'totalbytes': self.totalbytes,
+                    'byterate': tbytes / telapsed if tbytes is not None else None,
+                    'eta': None,
+                    'updated': int(tnow)
+                 }
+        # prefer the byte position for the ETA, since item sizes vary
+        if self.totalbytes and tbytes:
+            tstats['eta'] = (self.totalbytes - tbytes) / tstats['byterate']
+        elif self.total and self.count:
+            tstats['eta'] = (self.total - self.count) / tstats['rate']
+        return tstats
+
+    def bytes(self):
+        if self.bytefunc:
+            try:
+                return self.bytefunc()
+            except Exception:
+                return None
+        return self.nbytes or None
+
+    def report(self, tnow=None):
+        """log the current stats, and write the stats file"""
+        tstats = self.stats(tnow)
+        if self.total:
+            tmsg = "%d / %d (%.1f%%)" % (self.count, self.total, 100.0 * self.count / self.total)
+        else:
+            tmsg = "%d" % (self.count)
+        tmsg += " - %.1f/sec" % (tstats['rate'])
+        if tstats['bytes'] is not None:
+            tmsg += ", %s" % (fmtsize(tstats['byterate'], rate=True).strip())
+        if tstats['eta'] is not None:
+            tmsg += ", ETA %s" % (fmtduration(tstats['eta']))
+        logthis(tmsg,prefix=self.name,loglevel=self.loglevel)
+        g_stats[self.name] = tstats
+        write_stats()
+
+    def done(self):
+        """log the final count & rate, and remove this reporter from the stats file"""
+        tstats = self.stats()
+        if tstats['elapsed'] >= self.interval > 0:
+            logthis("%d done in %s - %.1f/sec" % (self.count, fmtduration(tstats['elapsed']), tstats['rate']),prefix=self.name,loglevel=self.loglevel)
+        if g_stats.pop(self.name, None) is not None:
+            write_stats()
+
+
+def fmtduration(secs):
+    """format seconds as H:MM:SS"""
+    secs = int(secs)
+    return "%d:%02d:%02d" % (secs // 3600, secs // 60 % 60, secs % 60)
+
+
+def write_stats():
+    """write all active reporters' stats to the stats file; the old file is replaced atomically"""
+    if not g_statsfile:
+        return
+    tpath = g_statsfile + '.tmp'
+    try:
+        with open(tpath,'w') as f:
+            json.dump(g_stats, f, indent=4, sort_keys=True)
+        os.rename(tpath, g_statsfile)
+    except Exception as e:
+        logthis("Failed to write stats file --",suffix=e,loglevel=LL.WARNING)
@@ -158,3 +158,19 @@ def setMerge(a,b):
             outd[tk] = tvd
 
     return outd
+
+
+def modopts(margs):
+    """
+    parse extra module pargs into a dict; 'key=value' pargs are split on the first '=',
+    and bare flags (eg. 'clear') are set to True
+    """
+    mopts = {}
+    for targ in margs:
+        if '=' in targ:
+            tk,tv = targ.split('=',1)
+            mopts[tk.strip()] = tv.strip()
+        else:
+            mopts[targ.strip()] = True
+    logthis("Module options:",suffix=mopts,loglevel=LL.DEBUG2)
+    return mopts
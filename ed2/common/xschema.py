@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# xschema - ed2/common/xschema.py
+# edparse2: Schema-driven XML element extractor
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+"""
+A schema is a dict mapping child element tags to (handler, key, arg) tuples.
+extract() iterates over the children of an element exactly once, and dispatches
+each child to the handler for its tag; children with no handler are skipped.
+
+Handlers are called as handler(out, key, arg, elem, ctx), where out is the dict
+being built, and ctx is an optional context object passed through from extract()
+
+project() returns a copy of a schema with some leaf output keys removed, and/or only
+some languages kept, so that unwanted data is skipped rather than extracted
+"""
+
+__all__ = [
+            'extract', 'project', 'schema_leaves', 'XML_LANG',
+            'x_text', 'x_int', 'x_list', 'x_intlist', 'x_flag', 'x_entity',
+            'x_lang', 'x_langsel', 'x_attrmap', 'x_attrlist', 'x_sub', 'x_into'
+          ]
+
+# xml:lang attribute
+XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+
+
+def extract(elem, schema, ctx=None, out=None):
+    """
+    extract data from the children of elem into dict out (or a new dict), using schema
+    """
+    if out is None:
+        out = {}
+    for sv in elem:
+        tx = schema.get(sv.tag)
+        if tx is not None:
+            tx[0](out, tx[1], tx[2], sv, ctx)
+    return out
+
+def x_text(out, key, arg, elem, ctx):
+    """out[key] = text"""
+    out[key] = elem.text
+
+def x_int(out, key, arg, elem, ctx):
+    """out[key] = int(text)"""
+    out[key] = int(elem.text)
+
+def x_list(out, key, arg, elem, ctx):
+    """append text to list out[key]"""
+    if key in out:
+        out[key].append(elem.text)
+    else:
+        out[key] = [elem.text]
+
+def x_intlist(out, key, arg, elem, ctx):
+    """append int(text) to list out[key]"""
+    if key in out:
+        out[key].append(int(elem.text))
+    else:
+        out[key] = [int(elem.text)]
+
+def x_flag(out, key, arg, elem, ctx):
+    """out[key] = True if the element is present"""
+    out[key] = True
+
+def x_entity(out, key, arg, elem, ctx):
+    """
+    map entity name => expanded text in dict out[key]
+    ctx['revent'] must be the reverse entity mapping (expanded text => entity name)
+    """
+    if key not in out:
+        out[key] = {}
+    out[key][ctx['revent'][elem.text]] = elem.text
+
+def x_lang(out, key, arg, elem, ctx):
+    """
+    append text to out[key][lang]; arg is a tuple of (attribute name, default lang)
+    used to determine the language, eg. (XML_LANG, 'eng')
+    """
+    tlang = elem.get(arg[0], arg[1])
+    if key not in out:
+        out[key] = {}
+    if tlang in out[key]:
+        out[key][tlang].append(elem.text)
+    else:
+        out[key][tlang] = [elem.text]
+
+def x_langsel(out, key, arg, elem, ctx):
+    """
+    same as x_lang, but only languages in the set arg[2] are kept;
+    arg is a tuple of (attribute name, default lang, set of langs)
+    """
+    tlang = elem.get(arg[0], arg[1])
+    if tlang not in arg[2]:
+        return
+    if key not in out:
+        out[key] = {}
+    if tlang in out[key]:
+        out[key][tlang].append(elem.text)
+    else:
+        out[key][tlang] = [elem.text]
+
+def x_attrmap(out, key, arg, elem, ctx):
+    """out[key][attribute arg] = text; out[key] must already exist"""
+    out[key][elem.get(arg)] = elem.text
+
+def x_attrlist(out, key, arg, elem, ctx):
+    """append text to list out[key][attribute arg]; out[key] must already exist"""
+    tattr = elem.get(arg)
+    if tattr in out[key]:
+        out[key][tattr].append(elem.text)
+    else:
+        out[key][tattr] = [elem.text]
+
+def x_sub(out, key, arg, elem, ctx):
+    """extract elem into a new dict with sub-schema arg, and append it to list out[key]"""
+    if key in out:
+        out[key].append(extract(elem, arg, ctx))
+    else:
+        out[key] = [extract(elem, arg, ctx)]
+
+def x_into(out, key, arg, elem, ctx):
+    """extract the children of elem into out using sub-schema arg (flatten)"""
+    extract(elem, arg, ctx, out)
+
+
+def project(schema, drop=None, langs=None):
+    """
+    return a copy of schema (and any sub-schemas) where leaf handlers with an output key
+    in drop are removed, and x_lang handlers are replaced with x_langsel to keep only
+    the languages in langs; if drop and langs are both empty, schema is returned as-is
+    Only output keys of leaves (see schema_leaves()) are matched, never tags, so that
+    containers (eg. x_into, x_sub) are always extracted
+    """
+    if not drop and not langs:
+        return schema
+    drop = set(drop or ())
+    out = {}
+    for tag,(handler,key,arg) in schema.iteritems():
+        if key in drop and not isinstance(arg, dict):
+            continue
+        if isinstance(arg, dict):
+            arg = project(arg, drop, langs)
+        elif handler is x_lang and langs:
+            handler = x_langsel
+            arg = (arg[0], arg[1], frozenset(langs))
+        out[tag] = (handler, key, arg)
+    return out
+
+def schema_leaves(schema):
+    """
+    return the set of output keys of all leaf handlers (those without a sub-schema) in
+    schema and its sub-schemas; these are the keys which project() can drop
+    """
+    out = set()
+    for tag,(handler,key,arg) in schema.iteritems():
+        if isinstance(arg, dict):
+            out |= schema_leaves(arg)
+        elif key:
+            out.add(key)
+    return out
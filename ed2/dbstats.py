@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# dbstats - ed2/dbstats.py
+# edparse2: Database call instrumentation
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+import os
+import sys
+import json
+import time
+import types
+import random
+import atexit
+import functools
+import threading
+
+from .common.logthis import *
+from .common.util import fmtsize
+from . import db
+
+__all__ = [ 'dbstats_config', 'dbstats_report', 'instrument' ]
+
+# operations taking at least this many seconds are written to the slow-op log (0 disables)
+g_slow = 0.1
+# if set, slow operations are appended to this file as JSON lines; otherwise they are logged
+g_slowlog = None
+# if set, the stats are written to this file as JSON by dbstats_report()
+g_dumpfile = None
+# op name => stats dict
+g_stats = {}
+# max latency samples kept per op for percentiles (reservoir sampling)
+g_samples = 4096
+# methods which are not timed, since they don't talk to the server
+skip_methods = ('bulk', 'pipeline', 'zkey', 'curpipe', 'makepipe', 'close', 'commit', 'rollback')
+
+class calldepth(threading.local):
+    depth = 0
+
+g_local = calldepth()
+
+
+def dbstats_config(enabled=False, slowms=100, slowlog=None, dumpfile=None):
+    """
+    Enable instrumentation of the ed2.db wrappers; when not enabled, nothing is wrapped,
+    so there is no overhead. The stats are reported at exit
+    """
+    global g_slow, g_slowlog, g_dumpfile
+    if not enabled:
+        return
+    g_slow = (slowms or 0) / 1000.0
+    g_slowlog = slowlog or None
+    g_dumpfile = dumpfile or None
+    instrument(db.mongo, 'mongo')
+    instrument(db.mongobulk, 'mongo', [ 'flush' ])
+    instrument(db.redis, 'redis', sizers=redis_sizers)
+    instrument(db.redispipe, 'redis', [ 'flush' ])
+    instrument(db.mysql, 'mysql')
+    instrument(db.psql, 'psql', sizers={ 'copy_from': lambda a,k,r: a[0].copybytes })
+    atexit.register(dbstats_report)
+    logthis("Database call instrumentation enabled; slow-op threshold:",suffix="%dms" % (slowms or 0),loglevel=LL.VERBOSE)
+
+
+def instrument(cls, kind, methods=None, sizers=None):
+    """
+    Replace methods of cls (default: all public methods) with timed wrappers; stats are
+    recorded as '<kind>.<method>'. sizers is a dict of method => func(args, kwargs, result)
+    returning the number of bytes transferred, where available
+    """
+    if getattr(cls, '_dbstats', False):
+        return
+    if methods is None:
+        methods = [ x for x,y in vars(cls).items() if callable(y) and not x.startswith('_') and x not in skip_methods ]
+    for tname in methods:
+        setattr(cls, tname, timed('%s.%s' % (kind, tname), getattr(cls, tname).im_func, (sizers or {}).get(tname)))
+    cls._dbstats = True
+
+
+def timed(op, func, sizer=None):
+    """
+    return a wrapper for func which records its latency as op; calls made from within
+    another timed call (eg. mongo.find => mongo.iterfind) are not recorded separately
+    If func returns a generator, the time spent fetching each item is recorded once
+    the generator is exhausted or closed
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if g_local.depth:
+            return func(*args, **kwargs)
+        g_local.depth += 1
+        tstart = time.time()
+        try:
+            rez = func(*args, **kwargs)
+        except Exception:
+            g_local.depth -= 1
+            record(op, time.time() - tstart, args, error=True)
+            raise
+        g_local.depth -= 1
+        elapsed = time.time() - tstart
+        if isinstance(rez, types.GeneratorType):
+            return timed_iter(op, rez, elapsed, args)
+        record(op, elapsed, args, sizer(args, kwargs, rez) if sizer else None,
+               len(rez) if isinstance(rez, (list, dict)) else None)
+        return rez
+    return wrapper
+
+
+def timed_iter(op, gen, elapsed, args):
+    """Generator; yield from gen, timing each fetch, and record the total once done"""
+    count = 0
+    error = False
+    try:
+        while True:
+            g_local.depth += 1
+            tstart = time.time()
+            try:
+                titem = next(gen)
+            except StopIteration:
+                break
+            except Exception:
+                error = True
+                raise
+            finally:
+                elapsed += time.time() - tstart
+                g_local.depth -= 1
+            count += 1
+            yield titem
+    finally:
+        gen.close()
+        record(op, elapsed, args, items=count, error=error)
+
+
+def record(op, elapsed, args, nbytes=None, items=None, error=False):
+    """add a call of op to the stats, and log it to the slow-op log if over the threshold"""
+    tstat = g_stats.get(op)
+    if tstat is None:
+        tstat = g_stats[op] = { 'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'bytes': 0, 'items': 0, 'samples': [] }
+    tstat['count'] += 1
+    tstat['total'] += elapsed
+    if elapsed > tstat['max']:
+        tstat['max'] = elapsed
+    if nbytes:
+        tstat['bytes'] += nbytes
+    if items:
+        tstat['items'] += items
+    if error:
+        tstat['errors'] += 1
+    if len(tstat['samples']) < g_samples:
+        tstat['samples'].append(elapsed)
+    else:
+        ti = random.randint(0, tstat['count'] - 1)
+        if ti < g_samples:
+            tstat['samples'][ti] = elapsed
+
+    if g_slow and elapsed >= g_slow:
+        slowop(op, elapsed, args)
+
+
+def slowop(op, elapsed, args):
+    # args[0] is the wrapper instance; the next arg is usually the collection, key or query
+    target = repr(args[1])[:200] if len(args) > 1 else None
+    if g_slowlog:
+        try:
+            with open(g_slowlog, 'a') as f:
+                f.write(json.dumps({ 'time': time.time(), 'op': op, 'ms': round(elapsed * 1000.0, 3), 'target': target }) + '\n')
+        except Exception as e:
+            logthis("Failed to write slow-op log --",suffix=e,loglevel=LL.WARNING)
+    else:
+        logthis("Slow operation: %s took %.1fms --" % (op, elapsed * 1000.0),suffix=target,loglevel=LL.WARNING)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    tsorted = sorted(samples)
+    return tsorted[min(len(tsorted) - 1, int(len(tsorted) * pct / 100.0))]
+
+
+def stats():
+    """return a dict of op => summary stats (latencies in seconds)"""
+    return dict((op, {
+                        'count': ts['count'],
+                        'errors': ts['errors'],
+                        'total': ts['total'],
+                        'avg': ts['total'] / ts['count'],
+                        'p50': percentile(ts['samples'], 50),
+                        'p99': percentile(ts['samples'], 99),
+                        'max': ts['max'],
+                        'bytes': ts['bytes'],
+                        'items': ts['items']
+                     }) for op,ts in g_stats.iteritems())
+
+
+def dbstats_report():
+    """log the stats of all timed operations, and write them to the dump file, if set"""
+    if not g_stats:
+        return
+    tstats = stats()
+    logthis("Database operations (total time, slowest first):",loglevel=LL.INFO)
+    logthis("%-24s %9s %10s %9s %9s %9s %10s %9s" % ('op','count','total','avg ms','p50 ms','p99 ms','bytes','items'),loglevel=LL.INFO)
+    for op,ts in sorted(tstats.items(), key=lambda x: -x[1]['total']):
+        logthis("%-24s %9d %9.3fs %9.3f %9.3f %9.3f %10s %9d" % (op, ts['count'], ts['total'], ts['avg'] * 1000.0, ts['p50'] * 1000.0,
+                                                              ts['p99'] * 1000.0, fmtsize(ts['bytes']).strip() if ts['bytes'] else '-', ts['items']),loglevel=LL.INFO)
+        if ts['errors']:
+            logthis("%d calls failed" % (ts['errors']),prefix=op,loglevel=LL.WARNING)
+
+    if g_dumpfile:
+        try:
+            with open(g_dumpfile,'w') as f:
+                json.dump(tstats, f, indent=4, sort_keys=True)
+            logthis("Wrote database stats to",suffix=g_dumpfile,loglevel=LL.INFO)
+        except Exception as e:
+            logthis("Failed to write database stats --",suffix=e,loglevel=LL.WARNING)
+    g_stats.clear()
+
+
+def strlen(val):
+    return len(val) if isinstance(val, basestring) else 0
+
+redis_sizers = {
+                    'set': lambda a,k,r: strlen(a[2]) if len(a) > 2 else 0,
+                    'setex': lambda a,k,r: strlen(a[2]) if len(a) > 2 else 0,
+                    'get': lambda a,k,r: strlen(r),
+                    'mget': lambda a,k,r: sum(strlen(x) for x in r)
+               }
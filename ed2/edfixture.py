@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# edfixture - ed2/edfixture.py
+# edparse2: Synthetic EDRDG fixture generator
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+"""
+Generates JMdict, JMnedict, KanjiDic2, KRADFILE and KRADFILE2 files with the same
+structure as the EDRDG originals (including an internal DTD with entity definitions),
+filled with random data. Output is fully determined by the parameters and seed, so
+the same fixture can be regenerated to compare benchmark runs across commits
+"""
+
+import os
+import codecs
+import gzip
+import random
+
+__all__ = [ 'generate' ]
+
+# entity definitions for the internal DTD; (name, expansion)
+jm_entities = [
+                ('n', "noun (common) (futsuumeishi)"),
+                ('v1', "Ichidan verb"),
+                ('v5u', "Godan verb with `u' ending"),
+                ('adj-i', "adjective (keiyoushi)"),
+                ('exp', "expressions (phrases, clauses, etc.)"),
+                ('uk', "word usually written using kana alone"),
+                ('io', "irregular okurigana usage"),
+                ('ik', "word containing irregular kana usage"),
+                ('oK', "word containing out-dated kanji"),
+                ('comp', "computer terminology"),
+                ('ling', "linguistics terminology"),
+                ('surname', "family or surname"),
+                ('given', "given name or forename, gender not specified"),
+                ('place', "place name"),
+                ('company', "company name")
+              ]
+
+jm_pos = ('n', 'v1', 'v5u', 'adj-i', 'exp')
+jm_misc = ('uk',)
+jm_field = ('comp', 'ling')
+jm_name_type = ('surname', 'given', 'place', 'company')
+jm_pri = ('ichi1', 'ichi2', 'news1', 'news2', 'spec1', 'spec2', 'gai1', 'nf01', 'nf05', 'nf12', 'nf24', 'nf48')
+jm_langs = ('ger', 'fre', 'rus', 'dut')
+
+# radical components used for KRADFILE
+radicals = u'一丨丶丿乙亅二亠人儿入八冂冖冫几凵刀力勹匕匚十卜厂厶又口囗土士夂夕大女子宀寸小尢尸山川工己巾干幺广廴廾弋弓彡彳心戈戸手支文斗斤方日曰月木欠止歹殳比毛氏水火爪父爻片牛犬'
+
+hiragana = [ unichr(x) for x in range(0x3042, 0x3094) ]
+katakana = [ unichr(x) for x in range(0x30A2, 0x30F4) ]
+
+
+def generate(outdir, entries=5000, kanji=2000, seed=1, compress=False):
+    """
+    Write a synthetic fixture to outdir, with the specified number of JMdict & JMnedict
+    entries and KanjiDic2 characters; if compress is True, files are gzip compressed
+    Returns a dict of target name => file path, in the same form as edparser.find_targets()
+    """
+    rng = random.Random(seed)
+    outdir = os.path.realpath(outdir)
+    if not os.path.exists(outdir):
+        os.makedirs(outdir)
+
+    # only kanji which can be encoded in EUC-JP, so that they can also be used in KRADFILE
+    klist = []
+    kcode = 0x4E00
+    while len(klist) < kanji and kcode <= 0x9FA5:
+        if len(unichr(kcode).encode('euc-jp', 'ignore')):
+            klist.append(unichr(kcode))
+        kcode += 1
+
+    suffix = '.gz' if compress else ''
+    tmap = {
+                'jmdict': os.path.join(outdir, 'JMdict_e' + suffix),
+                'jmnedict': os.path.join(outdir, 'JMnedict.xml' + suffix),
+                'kanjidic': os.path.join(outdir, 'kanjidic2.xml' + suffix),
+                'kradfile': os.path.join(outdir, 'kradfile' + suffix),
+                'kradfile2': os.path.join(outdir, 'kradfile2' + suffix)
+           }
+
+    with fixture_open(tmap['jmdict'], 'utf-8') as f:
+        write_jmdict(f, rng, klist, entries, 1000000, False)
+    with fixture_open(tmap['jmnedict'], 'utf-8') as f:
+        write_jmdict(f, rng, klist, entries, 5000000, True)
+    with fixture_open(tmap['kanjidic'], 'utf-8') as f:
+        write_kanjidic(f, rng, klist)
+    with fixture_open(tmap['kradfile'], 'euc-jp') as f:
+        write_kradfile(f, rng, klist[:len(klist) * 2 // 3])
+    with fixture_open(tmap['kradfile2'], 'euc-jp') as f:
+        write_kradfile(f, rng, klist[len(klist) * 2 // 3:])
+
+    return tmap
+
+
+def fixture_open(fpath, encoding):
+    """open fpath for writing text in the specified encoding, gzip compressed if it ends in .gz"""
+    if fpath.endswith('.gz'):
+        return codecs.getwriter(encoding)(gzip.open(fpath, 'wb'))
+    else:
+        return codecs.open(fpath, 'w', encoding)
+
+
+def write_jmdict(f, rng, klist, entries, seqbase, names):
+    """write a JMdict (or JMnedict, if names is True) XML file with an internal DTD"""
+    root = 'JMnedict' if names else 'JMdict'
+    f.write(u'<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE %s [\n' % (root))
+    f.write(u'<!ELEMENT %s (entry*)>\n' % (root))
+    for ename,etext in jm_entities:
+        f.write(u'<!ENTITY %s "%s">\n' % (ename, etext))
+    f.write(u']>\n<%s>\n' % (root))
+
+    for i in range(entries):
+        f.write(u'<entry>\n<ent_seq>%d</ent_seq>\n' % (seqbase + i))
+
+        kebs = []
+        for ki in range(rng.choice((0, 1, 1, 1, 2))):
+            keb = u''.join(rng.sample(klist, rng.randint(1, 3)))
+            kebs.append(keb)
+            f.write(u'<k_ele>\n<keb>%s</keb>\n' % (keb))
+            if rng.random() < 0.05:
+                f.write(u'<ke_inf>&%s;</ke_inf>\n' % (rng.choice(('io', 'oK'))))
+            if rng.random() < 0.3:
+                for tpri in rng.sample(jm_pri, rng.randint(1, 2)):
+                    f.write(u'<ke_pri>%s</ke_pri>\n' % (tpri))
+            f.write(u'</k_ele>\n')
+
+        for ri in range(rng.choice((1, 1, 1, 2))):
+            kana = katakana if rng.random() < 0.15 else hiragana
+            f.write(u'<r_ele>\n<reb>%s</reb>\n' % (u''.join(rng.choice(kana) for x in range(rng.randint(2, 6)))))
+            if not kebs:
+                pass
+            elif ri > 0 and rng.random() < 0.3:
+                f.write(u'<re_nokanji/>\n')
+            elif len(kebs) > 1 and rng.random() < 0.3:
+                f.write(u'<re_restr>%s</re_restr>\n' % (kebs[0]))
+            if rng.random() < 0.03:
+                f.write(u'<re_inf>&ik;</re_inf>\n')
+            if rng.random() < 0.3:
+                f.write(u'<re_pri>%s</re_pri>\n' % (rng.choice(jm_pri)))
+            f.write(u'</r_ele>\n')
+
+        if names:
+            f.write(u'<trans>\n')
+            for tnt in rng.sample(jm_name_type, rng.choice((1, 1, 2))):
+                f.write(u'<name_type>&%s;</name_type>\n' % (tnt))
+            f.write(u'<trans_det>Name %d</trans_det>\n' % (i))
+            if rng.random() < 0.1:
+                f.write(u'<trans_det xml:lang="ger">Name %d</trans_det>\n' % (i))
+            f.write(u'</trans>\n')
+        else:
+            for si in range(rng.randint(1, 3)):
+                f.write(u'<sense>\n')
+                if kebs and rng.random() < 0.05:
+                    f.write(u'<stagk>%s</stagk>\n' % (kebs[0]))
+                f.write(u'<pos>&%s;</pos>\n' % (rng.choice(jm_pos)))
+                if rng.random() < 0.1:
+                    f.write(u'<xref>%s</xref>\n' % (rng.choice(klist)))
+                if rng.random() < 0.02:
+                    f.write(u'<ant>%s</ant>\n' % (rng.choice(klist)))
+                if rng.random() < 0.05:
+                    f.write(u'<field>&%s;</field>\n' % (rng.choice(jm_field)))
+                if rng.random() < 0.2:
+                    f.write(u'<misc>&%s;</misc>\n' % (rng.choice(jm_misc)))
+                if rng.random() < 0.05:
+                    f.write(u'<s_inf>usage note %d</s_inf>\n' % (i))
+                if rng.random() < 0.03:
+                    f.write(u'<lsource xml:lang="eng">source</lsource>\n')
+                if rng.random() < 0.02:
+                    f.write(u'<dial>ksb:</dial>\n')
+                for gi in range(rng.randint(1, 3)):
+                    f.write(u'<gloss>meaning %d.%d.%d</gloss>\n' % (i, si, gi))
+                for tlang in jm_langs:
+                    if rng.random() < 0.2:
+                        f.write(u'<gloss xml:lang="%s">%s %d.%d</gloss>\n' % (tlang, tlang, i, si))
+                f.write(u'</sense>\n')
+
+        f.write(u'</entry>\n')
+
+    f.write(u'</%s>\n' % (root))
+
+
+def write_kanjidic(f, rng, klist):
+    """write a KanjiDic2 XML file"""
+    f.write(u'<?xml version="1.0" encoding="UTF-8"?>\n<kanjidic2>\n')
+    f.write(u'<header>\n<file_version>4</file_version>\n<database_version>synthetic</database_version>\n</header>\n')
+
+    for i,tkanji in enumerate(klist):
+        f.write(u'<character>\n<literal>%s</literal>\n' % (tkanji))
+        f.write(u'<codepoint>\n<cp_value cp_type="ucs">%x</cp_value>\n' % (ord(tkanji)))
+        f.write(u'<cp_value cp_type="jis208">%d-%d-%d</cp_value>\n</codepoint>\n' % (1, i // 94 + 16, i % 94 + 1))
+        f.write(u'<radical>\n<rad_value rad_type="classical">%d</rad_value>\n</radical>\n' % (i % 214 + 1))
+
+        f.write(u'<misc>\n')
+        if rng.random() < 0.6:
+            f.write(u'<grade>%d</grade>\n' % (rng.choice((1, 2, 3, 4, 5, 6, 8, 9, 10))))
+        f.write(u'<stroke_count>%d</stroke_count>\n' % (rng.randint(1, 24)))
+        if rng.random() < 0.1:
+            f.write(u'<variant var_type="jis208">1-%d-%d</variant>\n' % (rng.randint(16, 84), rng.randint(1, 94)))
+        if rng.random() < 0.7:
+            f.write(u'<freq>%d</freq>\n' % (i + 1))
+        if rng.random() < 0.5:
+            f.write(u'<jlpt>%d</jlpt>\n' % (rng.randint(1, 4)))
+        f.write(u'</misc>\n')
+
+        f.write(u'<dic_number>\n<dic_ref dr_type="nelson_c">%d</dic_ref>\n' % (i + 1))
+        f.write(u'<dic_ref dr_type="moro" m_vol="%d" m_page="%04d">%d</dic_ref>\n</dic_number>\n' % (i % 12 + 1, i + 1, i + 1))
+        f.write(u'<query_code>\n<q_code qc_type="skip">%d-%d-%d</q_code>\n' % (rng.randint(1, 4), rng.randint(1, 12), rng.randint(1, 12)))
+        f.write(u'<q_code qc_type="four_corner">%04d.%d</q_code>\n</query_code>\n' % (rng.randint(0, 9999), rng.randint(0, 9)))
+
+        f.write(u'<reading_meaning>\n<rmgroup>\n')
+        f.write(u'<reading r_type="pinyin">x%d</reading>\n' % (i))
+        f.write(u'<reading r_type="ja_on">%s</reading>\n' % (u''.join(rng.choice(katakana) for x in range(2))))
+        for ki in range(rng.randint(0, 2)):
+            f.write(u'<reading r_type="ja_kun">%s</reading>\n' % (u''.join(rng.choice(hiragana) for x in range(3))))
+        for mi in range(rng.randint(1, 3)):
+            f.write(u'<meaning>meaning %d.%d</meaning>\n' % (i, mi))
+        if rng.random() < 0.5:
+            f.write(u'<meaning m_lang="fr">sens %d</meaning>\n' % (i))
+        f.write(u'</rmgroup>\n')
+        if rng.random() < 0.2:
+            f.write(u'<nanori>%s</nanori>\n' % (u''.join(rng.choice(hiragana) for x in range(2))))
+        f.write(u'</reading_meaning>\n</character>\n')
+
+    f.write(u'</kanjidic2>\n')
+
+
+def write_kradfile(f, rng, klist):
+    """write a KRADFILE (kanji : radical radical ...)"""
+    f.write(u'# KRADFILE - synthetic fixture\n#\n')
+    for tkanji in klist:
+        f.write(u'%s : %s\n' % (tkanji, u' '.join(rng.sample(radicals, rng.randint(1, 6)))))
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# jmcompact - ed2/jmcompact.py
+# edparse2: Compact in-memory representation of JMDict/JMnedict entries
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+"""
+Entries are stored as __slots__ objects rather than dicts. Lists become tuples,
+missing fields are None, entity-valued fields (pos, misc, ke_inf, etc.) are stored
+as tuples of small integer ids into a single shared EntityTable, and repeated short
+strings (priorities, languages, name types) are interned in the same table. The table
+is seeded from the DTD entity list (see edparser.resolveEntities()), so ids follow DTD
+order and don't depend on the order of the entries.
+Use to_dict() to get back the exact dict produced by edparser.jmdict_entry()
+"""
+
+__all__ = [ 'EntityTable', 'JMEntry', 'KEle', 'REle', 'Sense', 'Trans', 'compact_entry' ]
+
+
+class EntityTable(object):
+    """
+    Shared table of entity definitions; each entity name is assigned a small integer id
+    Also interns repeated strings, since intern() can't be used with unicode objects
+    entities is an ordered mapping of entity name => content, as returned by
+    edparser.resolveEntities(); see seed()
+    """
+    __slots__ = ('names', 'content', 'ids', 'strtab')
+
+    def __init__(self, entities=None):
+        self.names = []
+        self.content = []
+        self.ids = {}
+        self.strtab = {}
+        if entities:
+            self.seed(entities)
+
+    def seed(self, entities):
+        """
+        add each entity in entities (name => content) in order; seeding the table with
+        the DTD of each file in the same order always yields the same ids
+        """
+        for k,v in entities.iteritems():
+            self.add(k, v)
+
+    def add(self, name, content):
+        """return id for entity name, adding it to the table if needed"""
+        eid = self.ids.get(name)
+        if eid is None:
+            eid = len(self.names)
+            self.ids[name] = eid
+            self.names.append(name)
+            self.content.append(content)
+        return eid
+
+    def encode(self, emap):
+        """convert a dict of entity name => content to a tuple of ids"""
+        if emap is None:
+            return None
+        return tuple(self.add(k, v) for k,v in emap.iteritems())
+
+    def decode(self, eids):
+        """convert a tuple of ids back to a dict of entity name => content"""
+        return dict((self.names[x], self.content[x]) for x in eids)
+
+    def intern(self, tstr):
+        return self.strtab.setdefault(tstr, tstr)
+
+    def interns(self, tlist):
+        """intern each string in tlist; returns a tuple (or None)"""
+        if tlist is None:
+            return None
+        return tuple(self.intern(x) for x in tlist)
+
+    def langmap(self, lmap):
+        """convert a dict of lang => list of text to a tuple of (lang, (text, ...)) pairs"""
+        if lmap is None:
+            return None
+        return tuple((self.intern(k), tuple(v)) for k,v in lmap.iteritems())
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _tuple(tlist):
+    return None if tlist is None else tuple(tlist)
+
+def _put(out, key, val, conv=list):
+    """set out[key] = conv(val), unless val is None"""
+    if val is not None:
+        out[key] = conv(val)
+
+def _langdict(lpairs):
+    return dict((k, list(v)) for k,v in lpairs)
+
+
+class KEle(object):
+    __slots__ = ('keb', 'ke_inf', 'ke_pri')
+
+    def __init__(self, kele, enttab):
+        self.keb = kele['keb']
+        self.ke_inf = enttab.encode(kele.get('ke_inf'))
+        self.ke_pri = enttab.interns(kele.get('ke_pri'))
+
+    def to_dict(self, enttab):
+        out = { 'keb': self.keb }
+        _put(out, 'ke_inf', self.ke_inf, enttab.decode)
+        _put(out, 'ke_pri', self.ke_pri)
+        return out
+
+
+class REle(object):
+    __slots__ = ('reb', 're_nokanji', 're_restr', 're_inf', 're_pri')
+
+    def __init__(self, rele, enttab):
+        self.reb = rele['reb']
+        self.re_nokanji = rele.get('re_nokanji')
+        self.re_restr = _tuple(rele.get('re_restr'))
+        self.re_inf = enttab.encode(rele.get('re_inf'))
+        self.re_pri = enttab.interns(rele.get('re_pri'))
+
+    def to_dict(self, enttab):
+        out = { 'reb': self.reb }
+        _put(out, 're_nokanji', self.re_nokanji, bool)
+        _put(out, 're_restr', self.re_restr)
+        _put(out, 're_inf', self.re_inf, enttab.decode)
+        _put(out, 're_pri', self.re_pri)
+        return out
+
+
+class Sense(object):
+    __slots__ = ('stagk', 'stagr', 'xref', 'ant', 'pos', 'field', 'misc', 'lsource',
+                 'dial', 'gloss', 'example', 's_inf', 'pri')
+    # plain list fields
+    lfields = ('stagk', 'stagr', 'xref', 'ant', 'lsource', 'dial', 'example', 's_inf', 'pri')
+    # entity fields
+    efields = ('pos', 'field', 'misc')
+
+    def __init__(self, sen, enttab):
+        for tf in self.lfields:
+            setattr(self, tf, _tuple(sen.get(tf)))
+        for tf in self.efields:
+            setattr(self, tf, enttab.encode(sen.get(tf)))
+        self.gloss = enttab.langmap(sen.get('gloss'))
+
+    def to_dict(self, enttab):
+        out = {}
+        for tf in self.lfields:
+            _put(out, tf, getattr(self, tf))
+        for tf in self.efields:
+            _put(out, tf, getattr(self, tf), enttab.decode)
+        _put(out, 'gloss', self.gloss, _langdict)
+        return out
+
+
+class Trans(object):
+    __slots__ = ('name_type', 'xref', 'trans_det')
+
+    def __init__(self, tran, enttab):
+        self.name_type = enttab.interns(tran.get('name_type'))
+        self.xref = _tuple(tran.get('xref'))
+        self.trans_det = enttab.langmap(tran.get('trans_det'))
+
+    def to_dict(self, enttab):
+        out = {}
+        _put(out, 'name_type', self.name_type)
+        _put(out, 'xref', self.xref)
+        _put(out, 'trans_det', self.trans_det, _langdict)
+        return out
+
+
+class JMEntry(object):
+    """Compact JMDict/JMnedict entry; enttab is a reference to the shared EntityTable"""
+    __slots__ = ('ent_seq', 'kf_pmax', 'rf_pmax', 'k_ele', 'r_ele', 'sense', 'trans', 'enttab')
+    # sub-element fields & classes
+    sfields = (('k_ele', KEle), ('r_ele', REle), ('sense', Sense), ('trans', Trans))
+
+    def __init__(self, entry, enttab):
+        self.enttab = enttab
+        self.ent_seq = int(entry['ent_seq'])
+        self.kf_pmax = entry['kf_pmax']
+        self.rf_pmax = entry['rf_pmax']
+        for tf,tclass in self.sfields:
+            if tf in entry:
+                setattr(self, tf, tuple(tclass(x, enttab) for x in entry[tf]))
+            else:
+                setattr(self, tf, None)
+
+    @property
+    def _id(self):
+        return str(self.ent_seq)
+
+    def to_dict(self):
+        """return the entry as a dict, in the same form as edparser.jmdict_entry()"""
+        out = { '_id': self._id, 'ent_seq': self._id, 'kf_pmax': self.kf_pmax, 'rf_pmax': self.rf_pmax }
+        for tf,tclass in self.sfields:
+            tval = getattr(self, tf)
+            if tval is not None:
+                out[tf] = [ x.to_dict(self.enttab) for x in tval ]
+        return out
+
+
+def compact_entry(entry, enttab):
+    """convert an entry dict from edparser.jmdict_entry() to a JMEntry"""
+    return JMEntry(entry, enttab)
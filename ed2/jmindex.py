@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# jmindex - ed2/jmindex.py
+# edparse2: Headword & reading lookup indexes for JMDict/JMnedict
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+"""
+HeadwordIndex maps each headword (k_ele.keb) and reading (r_ele.reb) to the sorted
+list of ent_seq ids (as ints) of the entries which contain it. Keys are kana-normalized
+with kana_normalize(), so that a lookup in either hiragana or katakana will match.
+
+KanjiIndex maps each kanji used in a headword to a posting list of the ent_seq ids
+of the entries containing it, sorted by ent_seq so that the lists for several kanji
+can be intersected with a linear merge; results are then ranked by kf_pmax.
+
+Indexes are persisted as one document per key, either to a Mongo collection
+(<name>_<kind>, eg. jmdict_index) or a gzip'd JSON file, and loaded back into a dict
+"""
+
+import re
+import json
+import gzip
+
+__all__ = [ 'HeadwordIndex', 'KanjiIndex', 'kana_normalize', 'intersect_sorted' ]
+
+# katakana (ァ..ヶ) => hiragana (ぁ..ゖ)
+kana_xlate = dict((x, x - 0x60) for x in range(0x30A1, 0x30F7))
+
+# CJK unified ideographs (incl. extension A & B+) and compatibility ideographs
+kanji_rgx = re.compile(u'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0002ffff]')
+
+
+def kana_normalize(text):
+    """return text with all katakana converted to hiragana"""
+    return unicode(text).translate(kana_xlate)
+
+def intersect_sorted(alist, blist):
+    """return the intersection of two ascending lists of ints, as an ascending list"""
+    out = []
+    ai = bi = 0
+    alen = len(alist)
+    blen = len(blist)
+    while ai < alen and bi < blen:
+        av = alist[ai]
+        bv = blist[bi]
+        if av == bv:
+            out.append(av)
+            ai += 1
+            bi += 1
+        elif av < bv:
+            ai += 1
+        else:
+            bi += 1
+    return out
+
+
+class HeadwordIndex(object):
+    """
+    In-memory keb/reb => ent_seq index for a JMDict or JMnedict dataset
+    """
+    kind = 'index'
+    name = None
+    keb = {}
+    reb = {}
+
+    def __init__(self, name=None):
+        self.name = name
+        self.keb = {}
+        self.reb = {}
+
+    def add(self, entry):
+        """add the headwords & readings of a parsed entry to the index"""
+        tseq = int(entry['ent_seq'])
+        for tk in entry.get('k_ele', []):
+            self._add(self.keb, tk['keb'], tseq)
+        for tr in entry.get('r_ele', []):
+            self._add(self.reb, tr['reb'], tseq)
+
+    def _add(self, tdex, text, tseq):
+        tkey = kana_normalize(text)
+        tlist = tdex.get(tkey)
+        if tlist is None:
+            tdex[tkey] = [tseq]
+        elif tlist[-1] != tseq:
+            tlist.append(tseq)
+
+    def feed(self, entries):
+        """Generator; add each entry to the index, then yield it"""
+        for tentry in entries:
+            self.add(tentry)
+            yield tentry
+        self.finalize()
+
+    def finalize(self):
+        """sort all posting lists; entries may not arrive in ent_seq order"""
+        for tdex in (self.keb, self.reb):
+            for tlist in tdex.itervalues():
+                tlist.sort()
+
+    def lookup(self, text, field=None):
+        """
+        return the sorted list of ent_seq ids for text; field may be 'keb' or 'reb' to
+        only match headwords or readings, otherwise both are searched
+        """
+        tkey = kana_normalize(text)
+        if field:
+            return list(getattr(self, field).get(tkey, []))
+        return sorted(set(self.keb.get(tkey, [])) | set(self.reb.get(tkey, [])))
+
+    def docs(self):
+        """Generator; yield one document per key, as stored in Mongo or an index file"""
+        for tkey in set(self.keb) | set(self.reb):
+            tdoc = { '_id': tkey }
+            if tkey in self.keb:
+                tdoc['keb'] = self.keb[tkey]
+            if tkey in self.reb:
+                tdoc['reb'] = self.reb[tkey]
+            yield tdoc
+
+    def load_docs(self, docs):
+        """load the index from an iterable of documents produced by docs()"""
+        for tdoc in docs:
+            if 'keb' in tdoc:
+                self.keb[tdoc['_id']] = tdoc['keb']
+            if 'reb' in tdoc:
+                self.reb[tdoc['_id']] = tdoc['reb']
+        return self
+
+    def save(self, fpath):
+        """write the index to fpath as gzip'd JSON"""
+        with gzip.open(fpath, 'wb') as f:
+            f.write(json.dumps({ 'name': self.name, 'keb': self.keb, 'reb': self.reb }, ensure_ascii=False, separators=(',',':')).encode('utf-8'))
+
+    @classmethod
+    def load(cls, fpath):
+        """load an index previously written with save()"""
+        with gzip.open(fpath, 'rb') as f:
+            tdata = json.load(f)
+        tdex = cls(tdata['name'])
+        tdex.keb = tdata['keb']
+        tdex.reb = tdata['reb']
+        return tdex
+
+    @classmethod
+    def from_mongo(cls, mdx, collection):
+        """load an index from a Mongo collection (eg. jmdict_index)"""
+        return cls(collection.rsplit('_',1)[0]).load_docs(mdx.xcur[collection].find())
+
+    @property
+    def collection(self):
+        return '%s_%s' % (self.name, self.kind)
+
+    def __len__(self):
+        return len(self.keb) + len(self.reb)
+
+
+class KanjiIndex(object):
+    """
+    In-memory kanji => ent_seq posting lists for a JMDict dataset, built from k_ele.keb
+    pmax maps each ent_seq to the entry's kf_pmax, which is used to rank query results
+    """
+    kind = 'kanji'
+    name = None
+    posts = {}
+    pmax = {}
+
+    def __init__(self, name=None):
+        self.name = name
+        self.posts = {}
+        self.pmax = {}
+
+    def add(self, entry):
+        """add each kanji in the headwords of a parsed entry to the index"""
+        tseq = int(entry['ent_seq'])
+        tkanji = set()
+        for tk in entry.get('k_ele', []):
+            tkanji.update(kanji_rgx.findall(tk['keb']))
+        if not tkanji:
+            return
+        self.pmax[tseq] = entry.get('kf_pmax', 0)
+        for tkc in tkanji:
+            if tkc in self.posts:
+                self.posts[tkc].append(tseq)
+            else:
+                self.posts[tkc] = [tseq]
+
+    def feed(self, entries):
+        """Generator; add each entry to the index, then yield it"""
+        for tentry in entries:
+            self.add(tentry)
+            yield tentry
+        self.finalize()
+
+    def finalize(self):
+        """sort all posting lists; entries may not arrive in ent_seq order"""
+        for tlist in self.posts.itervalues():
+            tlist.sort()
+
+    def postings(self, kanji):
+        """return the posting list (ascending ent_seq ids) for a single kanji"""
+        return self.posts.get(kanji, [])
+
+    def words(self, kanji, limit=None):
+        """
+        return ent_seq ids of entries containing every kanji in the string kanji, ranked
+        by kf_pmax (highest first); eg. words(u'日本') for all words with both 日 and 本
+        """
+        tkeys = set(kanji_rgx.findall(unicode(kanji)))
+        if not tkeys:
+            return []
+        # intersect starting with the shortest lists, so that each merge is as small as possible
+        tlists = sorted((self.postings(x) for x in tkeys), key=len)
+        tout = tlists[0]
+        for tlist in tlists[1:]:
+            if not tout:
+                break
+            tout = intersect_sorted(tout, tlist)
+        tout = sorted(tout, key=lambda x: (-self.pmax.get(x, 0), x))
+        return tout[:limit] if limit else tout
+
+    def docs(self):
+        """
+        Generator; yield one document per kanji, as stored in Mongo or an index file
+        seq is the posting list, and pmax holds the kf_pmax of each ent_seq in seq
+        """
+        for tkey,tlist in self.posts.iteritems():
+            yield { '_id': tkey, 'seq': tlist, 'pmax': [ self.pmax[x] for x in tlist ] }
+
+    def load_docs(self, docs):
+        """load the index from an iterable of documents produced by docs()"""
+        for tdoc in docs:
+            self.posts[tdoc['_id']] = tdoc['seq']
+            self.pmax.update(zip(tdoc['seq'], tdoc['pmax']))
+        return self
+
+    def save(self, fpath):
+        """write the index to fpath as gzip'd JSON"""
+        with gzip.open(fpath, 'wb') as f:
+            f.write(json.dumps({ 'name': self.name, 'docs': list(self.docs()) }, ensure_ascii=False, separators=(',',':')).encode('utf-8'))
+
+    @classmethod
+    def load(cls, fpath):
+        """load an index previously written with save()"""
+        with gzip.open(fpath, 'rb') as f:
+            tdata = json.load(f)
+        return cls(tdata['name']).load_docs(tdata['docs'])
+
+    @classmethod
+    def from_mongo(cls, mdx, collection):
+        """load an index from a Mongo collection (eg. jmdict_kanji)"""
+        return cls(collection.rsplit('_',1)[0]).load_docs(mdx.xcur[collection].find())
+
+    @property
+    def collection(self):
+        return '%s_%s' % (self.name, self.kind)
+
+    def __len__(self):
+        return len(self.posts)
@@ -23,6 +23,7 @@ import os
 import sys
 import re
 import codecs
+import gzip
 import requests
 
 from ed2.common.logthis import *
@@ -50,11 +51,19 @@ def run(xconfig):
 
     logthis("Output directory:",suffix=outpath,loglevel=LL.INFO)
 
+    # check for extra options
+    # compressed: keep the files gzip'd (edparser can read .gz files directly)
+    margs = xconfig.run.modargs
+    compressed = 'compressed' in margs
+
     # fetch files
     fails = 0
     for tf in fmanifest:
         tfo = re.match('^https?://.+/([^/]+)\.gz$', tf['url']).group(1)
-        if not fetch(tf['url'], outpath+'/'+tfo, tf.get('encoding','utf-8')):
+        if compressed:
+            if not fetch_raw(tf['url'], outpath+'/'+tfo+'.gz'):
+                fails += 1
+        elif not fetch(tf['url'], outpath+'/'+tfo, tf.get('encoding','utf-8')):
             fails += 1
 
     return fails
@@ -87,3 +96,34 @@ def fetch(url,outfile,encoding='utf-8'):
 
     logthis(">> Wrote output to",suffix=ofrp,loglevel=LL.INFO)
     return True
+
+
+def fetch_raw(url,outfile):
+    """
+    fetch a gzip'd file from a URL and save it, still compressed
+    """
+    ofrp = os.path.realpath(os.path.expanduser(outfile))
+    logthis("Fetching:",suffix=url,loglevel=LL.INFO)
+
+    try:
+        r = requests.get(url)
+        r.raise_for_status()
+    except Exception as e:
+        logexc(e, "Failed to retrieve file")
+        return False
+
+    try:
+        if r.content[:2] == '\x1f\x8b':
+            with open(ofrp,'wb') as f:
+                f.write(r.content)
+        else:
+            # server sent the file with Content-Encoding: gzip, and it has already been
+            # decompressed by requests, so it must be compressed again
+            with gzip.open(ofrp,'wb') as f:
+                f.write(r.content)
+    except Exception as e:
+        logexc(e, "Failed to write output to %s" % (outfile))
+        return False
+
+    logthis(">> Wrote output to",suffix=ofrp,loglevel=LL.INFO)
+    return True
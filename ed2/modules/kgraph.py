@@ -29,9 +29,16 @@ import py2neo
 
 from ed2.common.logthis import *
 from ed2.common.util import *
+from ed2.common.progress import Progress
 from ed2.db import *
 
 
+# kanji fields used by run()
+kgraph_fields = [ 'kanji', 'freq', 'xrad', 'krad', 'meaning.en', 'reading.ja_on', 'reading.ja_kun',
+                  'reading.nanori', 'grade', 'jindex', 'jlpt', 'qcode.skip' ]
+radical_fields = [ 'alt', 'radname.ja', 'radname.en' ]
+
+
 def run(xconfig):
     """
     build graph in Neo4j based on the Kanji dataset
@@ -42,9 +49,11 @@ def run(xconfig):
     # connect to Mongo
     mgx = mongo(xconfig.mongo.uri)
 
-    # get all kanji from Mongo
-    kset = mgx.find("kanji", {})
-    logthis("** Kanji objects:",suffix=len(kset),loglevel=LL.INFO)
+    # stream kanji from Mongo, fetching only the fields used to build the graph
+    # each kanji can take a while to process, so the cursor must not time out
+    kcount = mgx.count("kanji")
+    kset = mgx.iterfind("kanji", {}, kgraph_fields, batch_size=500, no_cursor_timeout=True)
+    logthis("** Kanji objects:",suffix=kcount,loglevel=LL.INFO)
 
     # connect to Neo4j
     try:
@@ -72,7 +81,9 @@ def run(xconfig):
 
     # Build nodes & relationships
     logthis("** Building graph...",loglevel=LL.INFO)
-    for kk,tk in kset.iteritems():
+    prog = Progress("kgraph", total=kcount)
+    for kk,tk in enumerate(kset):
+        prog.update()
         logthis(">>>------[ %5d ] Kanji node <%s> -----" % (kk,tk['kanji']),loglevel=LL.DEBUG)
 
         # Kanji
@@ -86,12 +97,12 @@ def run(xconfig):
         if tk.has_key('xrad') and len(tk['xrad']) > 0:
             for tr,tv in tk['xrad'].iteritems():
                 # check if a radical exists in db.radical
-                rrad = mgx.findOne("radical", { "radical": tr })
+                rrad = mgx.findOne("radical", { "radical": tr }, radical_fields)
                 xrad = {}
                 if rrad:
                     xrad = { "rad_id": rrad['_id'], "alt": rrad['alt'], "radname": rrad['radname']['ja'], "radname_en": rrad['radname']['en'] }
                 else:
-                    rrad = mgx.findOne("kanji", { "kanji": tr })
+                    rrad = mgx.findOne("kanji", { "kanji": tr }, [ 'kanji', 'freq' ])
                     if rrad:
                         # Created Kanji-Kanji relationship
                         xrad = False
@@ -108,12 +119,12 @@ def run(xconfig):
         elif tk.has_key('krad'):
             for tr in tk['krad']:
                 # check if a radical exists in db.radical
-                rrad = mgx.findOne("radical", { "radical": tr })
+                rrad = mgx.findOne("radical", { "radical": tr }, radical_fields)
                 xrad = {}
                 if rrad:
                     xrad = { "rad_id": rrad['_id'], "alt": rrad['alt'], "radname": rrad['radname']['ja'], "radname_en": rrad['radname']['en'] }
                 else:
-                    rrad = mgx.findOne("kanji", { "kanji": tr })
+                    rrad = mgx.findOne("kanji", { "kanji": tr }, [ 'kanji', 'freq' ])
                     if rrad:
                         # Created Kanji-Kanji relationship
                         xrad = False
@@ -204,6 +215,8 @@ def run(xconfig):
             except Exception as e:
                 logexc(e,"Failed to build relationship")
 
+    prog.done()
+
 
 def get_topitem(inlist):
     """Get highest-ranked item from a dict of values"""
@@ -30,6 +30,7 @@ import py2neo
 
 from ed2.common.logthis import *
 from ed2.common.util import *
+from ed2.common.progress import Progress
 from ed2.db import *
 
 
@@ -43,8 +44,8 @@ def run(xconfig):
     # connect to Mongo
     mgx = mongo(xconfig.mongo.uri)
 
-    # get all kanji from Mongo
-    kset = mgx.find("kanji", {}, rdict=True)
+    # get all kanji from Mongo; only the fields used by getRelated() are fetched
+    kset = mgx.find("kanji", {}, rdict=True, projection=[ 'kanji', 'grade', 'jindex' ])
     logthis("** Kanji objects:",suffix=len(kset),loglevel=LL.INFO)
 
     # connect to Neo4j
@@ -59,6 +60,7 @@ def run(xconfig):
 
     # check through all kanji
     hasRelated = 0
+    prog = Progress("krelated", total=len(kset))
     for tkan in kset:
         # get the top 20 highest-scoring related nodes
         trel = getRelated(neo, kset, kset[tkan]['kanji'])
@@ -66,6 +68,8 @@ def run(xconfig):
         mgx.update_set("kanji", tkan, { 'krelated': trel })
         if len(trel) > 0:
             hasRelated += 1
+        prog.update()
+    prog.done()
 
     logthis("** Complete. Kanji with krelated data:",suffix=hasRelated,loglevel=LL.INFO)
 
@@ -114,7 +118,7 @@ def getRelated(neo,klist,inkanji,limit=20):
             tjoyo = None
             tjdex = None
         okan[tt[0]] = { 'score': tt[1], 'joyo': tjoyo, 'jindex': tjdex }
-        logthis("-- %s -> %s" % (tt[0],json.dumps(okan[tt[0]])),loglevel=LL.DEBUG)
+        logthis("-- %s ->" % (tt[0]),suffix=lambda: json.dumps(okan[tt[0]]),loglevel=LL.DEBUG)
 
     return okan
 
@@ -40,6 +40,7 @@ from bs4 import BeautifulSoup
 
 from ed2.common.logthis import *
 from ed2.common.util import *
+from ed2.common.progress import Progress
 from ed2.db import *
 
 radpal = [
@@ -103,8 +104,10 @@ def run(xconfig):
     # build PNG images
     if render:
         logthis("Rendering stroke-order diagrams...",loglevel=LL.INFO)
+        prog = Progress("kvgbuild render", total=ftots)
         for tf in kflist:
             ftit += 1
+            prog.update()
             if fmatchy.match(tf):
                 logthis("[ %i / %i ] Processing" % (ftit,ftots),suffix=tf,loglevel=LL.VERBOSE)
                 thiskvg = openKvg(inpath+'/'+tf)
@@ -117,6 +120,7 @@ def run(xconfig):
 
                 # destroy XML DOM object
                 thiskvg.unlink()
+        prog.done()
 
     # connect to mongo
     logthis("Connecting to",suffix=xconfig.mongo.uri,loglevel=LL.INFO)
@@ -124,8 +128,10 @@ def run(xconfig):
 
     # parse radical data
     logthis("Parsing kanji radical data...",loglevel=LL.INFO)
+    prog = Progress("kvgbuild parse", total=ftots)
     for tf in kflist:
         ftit += 1
+        prog.update()
         if fmatchy.match(tf):
             radlist = {}
             kid = os.path.splitext(os.path.split(tf)[1])[0]
@@ -134,6 +140,7 @@ def run(xconfig):
             # read
             with codecs.open(inpath+'/'+tf,'r','utf-8') as f:
                 thiskvg = f.read()
+            prog.update(0, os.path.getsize(inpath+'/'+tf))
 
             # parse with BS4 & lxml
             bs = BeautifulSoup(thiskvg,'xml')
@@ -184,6 +191,7 @@ def run(xconfig):
 
             mdx.update_set('kanji', "%x" % ord(kanji), { 'xrad': radlist } )
             logthis("** Committed entry:\n",suffix=print_r(radlist),loglevel=LL.DEBUG)
+    prog.done()
 
 
 def openKvg(infile):
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# pgload - ed2/pgload.py
+# edparse2: Postgres dictionary tables & COPY rows
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+import os
+import sys
+
+from .common.logthis import *
+from .db import pgarray
+from .sqlitedb import intval, dumpdoc
+
+__all__ = [ 'pg_tables', 'pg_table', 'pg_rowfunc' ]
+
+# table definitions for each kind of dataset: (columns, primary key, post-load indexes)
+# each table holds the full parsed entry as JSONB in doc, plus the key columns used for
+# lookups & joins; the primary key & indexes are added after the bulk load
+pg_tables = {
+    'kanji': (
+        [ ('id', 'text'), ('literal', 'text'), ('grade', 'integer'), ('strokes', 'integer'), ('freq', 'integer'),
+          ('jlpt', 'integer'), ('radical', 'integer'), ('doc', 'jsonb') ],
+        'id',
+        [ "CREATE INDEX {0}_literal ON {0} (literal)" ]
+    ),
+    'jmdict': (
+        [ ('ent_seq', 'integer'), ('keb', 'text[]'), ('reb', 'text[]'), ('kf_pmax', 'integer'), ('rf_pmax', 'integer'),
+          ('doc', 'jsonb') ],
+        'ent_seq',
+        [ "CREATE INDEX {0}_keb ON {0} USING gin (keb)", "CREATE INDEX {0}_reb ON {0} USING gin (reb)" ]
+    ),
+    'jmnedict': (
+        [ ('ent_seq', 'integer'), ('keb', 'text[]'), ('reb', 'text[]'), ('kf_pmax', 'integer'), ('rf_pmax', 'integer'),
+          ('name_type', 'text[]'), ('doc', 'jsonb') ],
+        'ent_seq',
+        [ "CREATE INDEX {0}_keb ON {0} USING gin (keb)", "CREATE INDEX {0}_reb ON {0} USING gin (reb)",
+          "CREATE INDEX {0}_name_type ON {0} USING gin (name_type)" ]
+    ),
+    'index': (
+        [ ('id', 'text'), ('doc', 'jsonb') ],
+        'id',
+        []
+    )
+}
+
+
+def pg_table(name, kind='set'):
+    """
+    return (table name, table definition) for dataset name ('kanji', 'jmdict' or
+    'jmnedict'), or for index collection name if kind is 'index' (table idx_<name>)
+    """
+    if kind == 'index':
+        return ('idx_' + name, pg_tables['index'])
+    return (name, pg_tables[name])
+
+def pg_rowfunc(name, kind='set'):
+    """return a function which converts an entry of dataset name to a row tuple for pg_table()"""
+    if kind == 'index':
+        return index_row
+    elif name == 'kanji':
+        return kanji_row
+    elif name == 'jmnedict':
+        return lambda x: jmdict_row(x) + (pgarray(sorted(set(y for tt in x.get('trans', ()) for y in tt.get('name_type', ())))), dumpdoc(x))
+    else:
+        return lambda x: jmdict_row(x) + (dumpdoc(x),)
+
+
+def kanji_row(entry):
+    return (entry['_id'], entry.get('kanji'), intval(entry.get('grade')), intval(entry.get('stroke_count')), intval(entry.get('freq')),
+            intval(entry.get('jlpt')), intval((entry.get('radical') or {}).get('classical')), dumpdoc(entry))
+
+def jmdict_row(entry):
+    """return the key columns of a JMDict or JMnedict entry, without doc"""
+    return (int(entry['ent_seq']), pgarray([ x['keb'] for x in entry.get('k_ele', ()) ]), pgarray([ x['reb'] for x in entry.get('r_ele', ()) ]),
+            entry.get('kf_pmax'), entry.get('rf_pmax'))
+
+def index_row(doc):
+    return (unicode(doc['_id']), dumpdoc(doc))
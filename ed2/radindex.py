@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# radindex - ed2/radindex.py
+# edparse2: Radical combination search index
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+"""
+RadicalIndex is built from the KRADFILE kanji => radicals mapping (edparser.krdex).
+Each kanji is assigned a bit position (in codepoint order), and each radical has a
+bitset (stored as a Python long) of all kanji which contain it. Finding the kanji that
+contain a set of radicals is then an AND of their bitsets, and finding which radicals
+can still be added is one more AND per radical.
+
+The index is persisted as one document per radical ({_id: radical, bits: hex}), plus
+a '_kanji' document holding the kanji for each bit position
+"""
+
+import json
+import gzip
+
+__all__ = [ 'RadicalIndex' ]
+
+
+class RadicalIndex(object):
+    """
+    Bitset index of radical => kanji
+    """
+    kind = 'bits'
+    name = None
+    kanji = []
+    bits = {}
+
+    def __init__(self, name='krad'):
+        self.name = name
+        self.kanji = []
+        self.bits = {}
+
+    @classmethod
+    def from_krdex(cls, krdex, name='krad'):
+        """build the index from a dict of kanji => list of radicals"""
+        tdex = cls(name)
+        tdex.kanji = sorted(krdex)
+        for kpos,tkanji in enumerate(tdex.kanji):
+            kbit = 1 << kpos
+            for trad in krdex[tkanji]:
+                tdex.bits[trad] = tdex.bits.get(trad, 0) | kbit
+        return tdex
+
+    def mask(self, radicals):
+        """return the bitset of kanji containing all of radicals"""
+        tmask = None
+        for trad in radicals:
+            tbits = self.bits.get(trad, 0)
+            tmask = tbits if tmask is None else tmask & tbits
+            if not tmask:
+                return 0
+        return tmask or 0
+
+    def decode(self, tmask):
+        """return the list of kanji for the set bits in tmask, in codepoint order"""
+        out = []
+        while tmask:
+            lowbit = tmask & -tmask
+            out.append(self.kanji[lowbit.bit_length() - 1])
+            tmask ^= lowbit
+        return out
+
+    def match(self, radicals):
+        """return the list of kanji which contain all of radicals"""
+        return self.decode(self.mask(radicals))
+
+    def addable(self, radicals):
+        """
+        return the set of radicals which can be added to radicals, and still match
+        at least one kanji
+        """
+        tmask = self.mask(radicals)
+        if not tmask:
+            return set()
+        return set(trad for trad,tbits in self.bits.iteritems() if tbits & tmask and trad not in radicals)
+
+    def docs(self):
+        """Generator; yield the kanji position document, then one document per radical"""
+        yield { '_id': '_kanji', 'kanji': self.kanji }
+        for trad,tbits in self.bits.iteritems():
+            yield { '_id': trad, 'bits': '%x' % (tbits) }
+
+    def load_docs(self, docs):
+        """load the index from an iterable of documents produced by docs()"""
+        for tdoc in docs:
+            if tdoc['_id'] == '_kanji':
+                self.kanji = tdoc['kanji']
+            else:
+                self.bits[tdoc['_id']] = long(tdoc['bits'], 16)
+        return self
+
+    def save(self, fpath):
+        """write the index to fpath as gzip'd JSON"""
+        with gzip.open(fpath, 'wb') as f:
+            f.write(json.dumps({ 'name': self.name, 'docs': list(self.docs()) }, ensure_ascii=False, separators=(',',':')).encode('utf-8'))
+
+    @classmethod
+    def load(cls, fpath):
+        """load an index previously written with save()"""
+        with gzip.open(fpath, 'rb') as f:
+            tdata = json.load(f)
+        return cls(tdata['name']).load_docs(tdata['docs'])
+
+    @classmethod
+    def from_mongo(cls, mdx, collection='krad_bits'):
+        """load an index from a Mongo collection (eg. krad_bits)"""
+        return cls(collection.rsplit('_',1)[0]).load_docs(mdx.xcur[collection].find())
+
+    @property
+    def collection(self):
+        return '%s_%s' % (self.name, self.kind)
+
+    def __len__(self):
+        return len(self.bits)
@@ -0,0 +1,501 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# sinks - ed2/sinks.py
+# edparse2: Output sinks for parsed datasets
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+import os
+import sys
+import re
+import json
+import time
+import hashlib
+import itertools
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from .common.logthis import *
+from .common.ndjson import NDJSONWriter, ndjson_open, ndjson_rgx
+from .db import mongo, psql, pgident
+from .sqlitedb import SqliteWriter, sqlite_path
+from .pgload import pg_table, pg_rowfunc
+
+__all__ = [ 'Sink', 'MongoSink', 'open_sink', 'sink_class', 'sink_schemes', 'entry_fingerprint' ]
+
+# matches msgpack paths; groups are (stem, extension, compression suffix)
+msgpack_rgx = re.compile(r'^(.*)\.(msgpack|mpk)((?:\.gz|\.zst)?)$', re.I)
+
+
+def entry_fingerprint(entry):
+    """
+    Return a stable fingerprint (SHA-1 hex digest) of a parsed entry's content
+    """
+    tjson = json.dumps(dict((k,v) for k,v in entry.iteritems() if k != '_fp'), sort_keys=True, separators=(',',':'))
+    return hashlib.sha1(tjson).hexdigest()
+
+
+def id_hash(tk):
+    """return a 63-bit hash of document _id tk, for compact sets of ids"""
+    if not isinstance(tk, unicode):
+        tk = str(tk).decode('utf-8')
+    return int(hashlib.sha1(tk.encode('utf-8')).hexdigest()[:16], 16) >> 1
+
+
+def textify(val):
+    """
+    return val with all str keys & values decoded to unicode, recursively; under Python 2,
+    msgpack packs str as bin, so dict keys (eg. 'ent_seq') and ASCII text from lxml would
+    otherwise be read back as bytes
+    """
+    if isinstance(val, str):
+        return val.decode('utf-8')
+    elif isinstance(val, dict):
+        return dict((textify(k), textify(v)) for k,v in val.iteritems())
+    elif isinstance(val, (list, tuple)):
+        return [ textify(x) for x in val ]
+    return val
+
+
+def uri_scheme(uri):
+    """return the scheme of uri (eg. 'mongodb'), or None"""
+    if '://' not in uri:
+        return None
+    return uri.split('://', 1)[0].lower()
+
+def uri_path(uri):
+    """
+    return the path for a file-based sink URI; everything after :// is the path, so
+    file+ndjson:///data/edict.ndjson is absolute, and file+ndjson://edict.ndjson is relative
+    """
+    tpath = uri.split('://', 1)[1]
+    if not tpath:
+        failwith(ER.OPT_BAD, "Output URI must include a path: %s" % (uri))
+    return os.path.realpath(os.path.expanduser(tpath))
+
+def set_path(fpath, name, rgx, ext):
+    """
+    return the output file for dataset name; if fpath matches rgx, name is inserted
+    before the extension (eg. edict.msgpack.gz => edict.kanji.msgpack.gz), otherwise
+    fpath is a directory, and the file is <fpath>/<name>.<ext>
+    """
+    tmatch = rgx.match(fpath)
+    if tmatch:
+        stem,text,comp = tmatch.groups()
+        return '%s.%s.%s%s' % (stem, name, text, comp)
+    if not os.path.exists(fpath):
+        os.makedirs(fpath)
+    return os.path.join(fpath, '%s.%s' % (name, ext))
+
+
+class Sink(object):
+    """
+    Base class for output sinks
+    write_set() reads entries from any iterable, and passes them to write_batch() in
+    lists of batch_size entries; subclasses implement write_batch(), plus any of the
+    open_set(), close_set(), finish() & abort() hooks they need
+
+    Datasets are written in order with write_set(); the indexes built from a dataset
+    are written with write_index() after the dataset, followed by complete(). finish()
+    returns False if any dataset was not fully written
+    """
+    scheme = None
+    uri = None
+    batch_size = 1000
+    counts = {}
+
+    def __init__(self, uri, batch_size=1000, **kwargs):
+        self.uri = uri
+        self.batch_size = batch_size
+        self.counts = {}
+
+    def write_set(self, name, entries, kind='set'):
+        """
+        write all entries of dataset name; entries can be a dict of entries keyed by _id,
+        or any iterable of entries. kind is 'set' for datasets, or 'index' for index docs
+        """
+        if isinstance(entries, dict):
+            entries = entries.itervalues()
+        tstart = time.time()
+        self.open_set(name, kind)
+        count = 0
+        entries = iter(entries)
+        while True:
+            batch = list(itertools.islice(entries, self.batch_size))
+            if not batch:
+                break
+            self.write_batch(name, batch)
+            count += len(batch)
+        self.close_set(name)
+        self.counts[name] = count
+        logthis("Wrote %d entries in %0.2fs" % (count, time.time() - tstart),prefix=name,loglevel=LL.INFO)
+        return count
+
+    def write_index(self, name, docs):
+        """write index docs (eg. from HeadwordIndex.docs()) for index collection name"""
+        return self.write_set(name, docs, 'index')
+
+    def skip(self, name):
+        """return True if dataset name has already been written (eg. when resuming)"""
+        return False
+
+    def complete(self, name):
+        """called once dataset name & its indexes have been written"""
+        pass
+
+    def open_set(self, name, kind):
+        pass
+
+    def write_batch(self, name, batch):
+        raise NotImplementedError
+
+    def close_set(self, name):
+        pass
+
+    def finish(self):
+        """called once all datasets have been written; returns True on success"""
+        return True
+
+    def abort(self):
+        """called if writing fails; clean up any partial output"""
+        pass
+
+
+class NullSink(Sink):
+    """Discards all entries; use null:// to measure parse throughput without any output"""
+    scheme = 'null'
+
+    def write_batch(self, name, batch):
+        pass
+
+
+class MongoSink(Sink):
+    """
+    Writes datasets to MongoDB, as unordered bulk upserts of one batch each; fields are
+    merged server-side, so fields added by other modules (eg. xrad, krelated) are preserved
+
+    Each entry is stored with a fingerprint of its parsed content (_fp); entries whose
+    fingerprint has not changed since the last import are skipped, unless full is True.
+    Existing fingerprints are fetched for each batch, rather than all at once; existing
+    documents without a fingerprint are counted as changed, and always updated.
+    Previously-imported entries which no longer exist in the dataset are removed; only
+    a hash of the _id of each entry is kept to find these, so that memory use stays low
+
+    If ckpt is an ed2.common.checkpoint.Checkpoint, collections which have already been
+    imported are skipped, and the _id of the last entry in each batch is recorded once
+    the batch has been written. If the checkpoint has a last committed entry for a
+    collection, all entries up to and including it are skipped; if that entry is not in
+    the input, the import fails, and the collection is reloaded in full on the next run
+
+    unset is a dict of dataset name => list of fields; any of these which are top-level
+    fields are removed from existing documents of the dataset when they are updated
+
+    If any writes for a dataset or its indexes fail, the dataset is not marked as done,
+    the checkpoint is kept so that the import can be resumed, and finish() returns False
+    """
+    scheme = 'mongodb'
+    mdx = None
+    full = False
+    ckpt = None
+    unset = None
+    cur = None
+    errors = 0
+    failed = []
+
+    def __init__(self, uri, batch_size=1000, full=False, ckpt=None, unset=None, **kwargs):
+        super(MongoSink, self).__init__(uri, batch_size)
+        self.full = full
+        self.ckpt = ckpt
+        self.unset = unset
+        self.cur = None
+        self.errors = 0
+        self.failed = []
+        logthis("Connecting to",suffix=uri,loglevel=LL.INFO)
+        self.mdx = mongo(uri)
+
+    def skip(self, name):
+        if self.ckpt and self.ckpt.done(name):
+            logthis("Already imported; skipping collection",suffix=name,loglevel=LL.INFO)
+            return True
+        return False
+
+    def complete(self, name):
+        if self.errors:
+            # keep the checkpoint at the last batch committed before the first failure
+            self.failed.append(name)
+        elif self.ckpt:
+            self.ckpt.complete(name)
+        self.errors = 0
+
+    def open_set(self, name, kind):
+        logthis(">> Updating collection:",suffix=name,loglevel=LL.INFO)
+
+        # fingerprints are only compared (and removed entries found) if the collection
+        # already has documents from a previous import
+        existing = self.mdx.findOne(name, {}, [ '_id' ]) is not None
+        logthis("Comparing fingerprints with previous import:",prefix=name,suffix=existing,loglevel=LL.VERBOSE)
+
+        resume = self.ckpt.last(name) if self.ckpt and kind == 'set' else None
+        if resume is not None:
+            logthis("Resuming after last committed entry:",prefix=name,suffix=resume,loglevel=LL.INFO)
+
+        if self.ckpt and kind == 'set':
+            mbulk = self.mdx.bulk(name, self.batch_size, lambda mb: mb.lastid is not None and self.ckpt.commit(name, mb.lastid))
+        else:
+            mbulk = self.mdx.bulk(name, self.batch_size)
+
+        self.cur = {
+                    'existing': existing, 'seen': set(), 'removed': 0, 'resume': resume, 'mbulk': mbulk,
+                    'unset': (self.unset or {}).get(name) if kind == 'set' else None,
+                    'added': 0, 'changed': 0, 'unchanged': 0, 'resumed': 0
+                   }
+
+    def write_batch(self, name, batch):
+        cur = self.cur
+        tlist = []
+        for tv in batch:
+            tk = tv['_id']
+            if cur['existing']:
+                cur['seen'].add(id_hash(tk))
+            if cur['resume'] is not None:
+                # already committed by the interrupted import
+                cur['resumed'] += 1
+                if tk == cur['resume']:
+                    cur['resume'] = None
+                continue
+            tlist.append(tv)
+
+        # get fingerprints from the last import for this batch; None if not set
+        lastfp = {}
+        if cur['existing'] and tlist:
+            lastfp = dict((x['_id'], x.get('_fp')) for x in self.mdx.iterfind(name, { '_id': { '$in': [ x['_id'] for x in tlist ] } }, [ '_fp' ]))
+
+        for tv in tlist:
+            tk = tv['_id']
+            tfp = entry_fingerprint(tv)
+            ofp = lastfp.get(tk)
+            if tk not in lastfp:
+                cur['added'] += 1
+            elif ofp != tfp:
+                cur['changed'] += 1
+            else:
+                cur['unchanged'] += 1
+                if not self.full:
+                    continue
+            tv['_fp'] = tfp
+            cur['mbulk'].upsert(tk, tv, cur['unset'])
+        cur['mbulk'].flush()
+
+    def close_set(self, name):
+        cur = self.cur
+        mbulk = cur['mbulk']
+        if cur['resume'] is not None:
+            # every entry was skipped as already committed, so nothing has been written; clear
+            # the progress for this collection, so that the next run reloads it in full
+            self.cur = None
+            self.ckpt.commit(name, None)
+            failwith(ER.PROCFAIL, "%s: last committed entry from checkpoint (%s) was not found in the input; "
+                                  "the checkpoint has been reset for this collection, re-run to reload it" % (name, cur['resume']))
+
+        # anything not in the input was in the last import, but has since been removed
+        if cur['existing']:
+            for tdoc in self.mdx.iterfind(name, None, [ '_id' ], batch_size=10000):
+                if id_hash(tdoc['_id']) not in cur['seen']:
+                    mbulk.delete(tdoc['_id'])
+                    cur['removed'] += 1
+        mbulk.close()
+
+        if mbulk.errors:
+            self.errors += mbulk.errors
+            logthis("Failed to write %d entries" % (mbulk.errors),prefix=name,loglevel=LL.ERROR)
+        logthis("update complete - updated: %d / created: %d / total:" % (mbulk.updated,mbulk.created),prefix=name,suffix=(mbulk.updated+mbulk.created),loglevel=LL.INFO)
+        logthis("changes - added: %d / changed: %d / removed: %d / unchanged (skipped): %d" % (cur['added'],cur['changed'],cur['removed'],cur['unchanged']),prefix=name,loglevel=LL.INFO)
+        if cur['resumed']:
+            logthis("resumed from checkpoint - already committed (skipped):",prefix=name,suffix=cur['resumed'],loglevel=LL.INFO)
+        self.cur = None
+
+    def finish(self):
+        if self.failed:
+            logthis("Import incomplete; writes failed for:",suffix=', '.join(self.failed),loglevel=LL.ERROR)
+            if self.ckpt:
+                logthis("Keeping checkpoint; re-run to resume --",suffix=self.ckpt.describe(),loglevel=LL.ERROR)
+            return False
+        if self.ckpt:
+            self.ckpt.finish()
+        return True
+
+
+class SqliteSink(Sink):
+    """
+    Builds a standalone SQLite database with an FTS5 gloss index (see ed2.sqlitedb);
+    each batch is inserted in its own transaction. The database is always rebuilt from
+    scratch, and replaces the existing file only once it is complete
+    """
+    scheme = 'sqlite'
+    sqw = None
+    rowfunc = None
+
+    def __init__(self, uri, batch_size=1000, **kwargs):
+        super(SqliteSink, self).__init__(uri, batch_size)
+        tpath = sqlite_path(uri)
+        logthis(">> Building SQLite database",suffix=tpath,loglevel=LL.INFO)
+        self.sqw = SqliteWriter(tpath)
+
+    def open_set(self, name, kind):
+        self.rowfunc = self.sqw.create(name, kind)
+
+    def write_batch(self, name, batch):
+        self.sqw.write(self.rowfunc, batch)
+
+    def finish(self):
+        self.sqw.finish()
+        return True
+
+    def abort(self):
+        self.sqw.abort()
+
+
+class PostgresSink(Sink):
+    """
+    Mirrors the datasets into Postgres tables (see ed2.pgload), with the full entry as
+    JSONB plus key columns; each batch is streamed with COPY ... FROM STDIN. Tables are
+    dropped & recreated, and the primary key & indexes are added once each table is
+    loaded; each table is committed once complete
+    """
+    scheme = 'postgresql'
+    pdx = None
+    table = None
+    tdef = None
+    rowfunc = None
+
+    def __init__(self, uri, batch_size=1000, **kwargs):
+        super(PostgresSink, self).__init__(uri, batch_size)
+        self.pdx = psql(dsn=uri)
+        if not self.pdx.xcon:
+            failwith(ER.PROCFAIL, "Unable to connect to Postgres")
+
+    def open_set(self, name, kind):
+        self.table,self.tdef = pg_table(name, kind)
+        self.rowfunc = pg_rowfunc(name, kind)
+        tident = pgident(self.table)
+        self.pdx.execute("DROP TABLE IF EXISTS %s" % (tident))
+        self.pdx.execute("CREATE TABLE %s (%s)" % (tident, ', '.join('%s %s' % (pgident(x), y) for x,y in self.tdef[0])))
+
+    def write_batch(self, name, batch):
+        self.pdx.copy_from(self.table, [ x[0] for x in self.tdef[0] ], (self.rowfunc(x) for x in batch))
+
+    def close_set(self, name):
+        tstart = time.time()
+        tident = pgident(self.table)
+        self.pdx.execute("ALTER TABLE %s ADD PRIMARY KEY (%s)" % (tident, pgident(self.tdef[1])))
+        for tq in self.tdef[2]:
+            self.pdx.execute(tq.format(self.table))
+        self.pdx.execute("ANALYZE %s" % (tident))
+        self.pdx.commit()
+        logthis("Created indexes in %0.2fs" % (time.time() - tstart),prefix=name,loglevel=LL.VERBOSE)
+
+    def abort(self):
+        self.pdx.rollback()
+
+
+class NDJSONSink(Sink):
+    """
+    Writes each dataset to its own NDJSON file, with one entry per line
+    If the path ends in .ndjson or .jsonl (optionally followed by .gz or .zst), the
+    dataset name is inserted before the extension; otherwise the path is a directory
+    Use ed2.common.ndjson.read_ndjson() to read the files back
+    """
+    scheme = 'file+ndjson'
+    fpath = None
+    writer = None
+
+    def __init__(self, uri, batch_size=1000, **kwargs):
+        super(NDJSONSink, self).__init__(uri, batch_size)
+        self.fpath = uri_path(uri)
+
+    def open_set(self, name, kind):
+        tpath = set_path(self.fpath, name, ndjson_rgx, 'ndjson')
+        self.writer = NDJSONWriter(tpath)
+
+    def write_batch(self, name, batch):
+        for tv in batch:
+            self.writer.write(tv)
+
+    def close_set(self, name):
+        self.writer.close()
+        logthis("Wrote output file",prefix=name,suffix=self.writer.fpath,loglevel=LL.VERBOSE)
+        self.writer = None
+
+
+class MsgpackSink(Sink):
+    """
+    Writes each dataset to its own file as a stream of MessagePack maps, one per entry
+    If the path ends in .msgpack or .mpk (optionally followed by .gz or .zst), the
+    dataset name is inserted before the extension; otherwise the path is a directory
+    All text is packed as str (see textify()), so read the files back with
+    msgpack.Unpacker(fh, raw=False)
+    """
+    scheme = 'msgpack'
+    fpath = None
+    fh = None
+    packer = None
+
+    def __init__(self, uri, batch_size=1000, **kwargs):
+        super(MsgpackSink, self).__init__(uri, batch_size)
+        if msgpack is None:
+            failwith(ER.DEPMISSING, "msgpack module is required for msgpack:// output")
+        self.fpath = uri_path(uri)
+        self.packer = msgpack.Packer(use_bin_type=True)
+
+    def open_set(self, name, kind):
+        tpath = set_path(self.fpath, name, msgpack_rgx, 'msgpack')
+        self.fh = ndjson_open(tpath, 'wb')
+        logthis("Writing output file",prefix=name,suffix=tpath,loglevel=LL.VERBOSE)
+
+    def write_batch(self, name, batch):
+        self.fh.write(''.join(self.packer.pack(textify(tv)) for tv in batch))
+
+    def close_set(self, name):
+        self.fh.close()
+        self.fh = None
+
+
+# URI scheme => sink class
+sink_schemes = {
+                    'mongodb': MongoSink,
+                    'mongodb+srv': MongoSink,
+                    'sqlite': SqliteSink,
+                    'postgresql': PostgresSink,
+                    'postgres': PostgresSink,
+                    'file+ndjson': NDJSONSink,
+                    'msgpack': MsgpackSink,
+                    'null': NullSink
+               }
+
+
+def sink_class(uri):
+    """return the sink class for uri, selected by URI scheme (see sink_schemes)"""
+    tscheme = uri_scheme(uri)
+    if tscheme not in sink_schemes:
+        failwith(ER.OPT_BAD, "Unsupported output URI '%s' (supported schemes: %s)" % (uri, ', '.join(sorted(sink_schemes))))
+    return sink_schemes[tscheme]
+
+def open_sink(uri, batch_size=1000, **kwargs):
+    """
+    Return a sink for uri, selected by URI scheme (see sink_schemes)
+    Any kwargs are passed to the sink; sinks ignore options they do not use
+    """
+    return sink_class(uri)(uri, batch_size, **kwargs)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# coding=utf-8
+###############################################################################
+#
+# sqlitedb - ed2/sqlitedb.py
+# edparse2: SQLite dictionary database writer
+#
+# @author   J. Hipps <jacob@ycnrg.org>
+# @repo     https://bitbucket.org/yellowcrescent/edparse2
+#
+# Copyright (c) 2016 J. Hipps / Neo-Retro Group
+#
+# https://ycnrg.org/
+# https://hotarun.co/
+#
+###############################################################################
+
+import os
+import sys
+import re
+import json
+import time
+import sqlite3
+
+from .common.logthis import *
+
+__all__ = [ 'SqliteWriter', 'sqlite_path' ]
+
+# tables for each dataset; the full parsed entry is kept as JSON in the doc column
+# of the main table, and the fields used for lookups are normalized into child tables
+# JMnedict translations are stored in jmnedict_sense & jmnedict_gloss, so that both
+# datasets can be searched the same way
+sql_schema = {
+    'kanji': [
+        "CREATE TABLE kanji (id TEXT PRIMARY KEY, literal TEXT, grade INTEGER, strokes INTEGER, freq INTEGER, jlpt INTEGER, radical INTEGER, doc TEXT)",
+        "CREATE TABLE kanji_reading (kanji_id TEXT, rtype TEXT, reading TEXT)",
+        "CREATE TABLE kanji_meaning (kanji_id TEXT, lang TEXT, meaning TEXT)"
+    ],
+    'jmdict': [
+        "CREATE TABLE {0} (ent_seq INTEGER PRIMARY KEY, kf_pmax INTEGER, rf_pmax INTEGER, doc TEXT)",
+        "CREATE TABLE {0}_kanji (ent_seq INTEGER, idx INTEGER, keb TEXT, pri TEXT)",
+        "CREATE TABLE {0}_reading (ent_seq INTEGER, idx INTEGER, reb TEXT, pri TEXT)",
+        "CREATE TABLE {0}_sense (ent_seq INTEGER, idx INTEGER, pos TEXT, misc TEXT, field TEXT)",
+        "CREATE TABLE {0}_gloss (ent_seq INTEGER, sense INTEGER, lang TEXT, gloss TEXT)"
+    ],
+    'index': [
+        "CREATE TABLE {0} (id TEXT PRIMARY KEY, doc TEXT)"
+    ]
+}
+
+# secondary indexes; these are created after the bulk load, which is much faster than
+# maintaining them while inserting
+sql_indexes = {
+    'kanji': [
+        "CREATE INDEX kanji_literal ON kanji (literal)",
+        "CREATE INDEX kanji_reading_id ON kanji_reading (kanji_id)",
+        "CREATE INDEX kanji_reading_reading ON kanji_reading (reading)",
+        "CREATE INDEX kanji_meaning_id ON kanji_meaning (kanji_id)"
+    ],
+    'jmdict': [
+        "CREATE INDEX {0}_kanji_seq ON {0}_kanji (ent_seq)",
+        "CREATE INDEX {0}_kanji_keb ON {0}_kanji (keb)",
+        "CREATE INDEX {0}_reading_seq ON {0}_reading (ent_seq)",
+        "CREATE INDEX {0}_reading_reb ON {0}_reading (reb)",
+        "CREATE INDEX {0}_sense_seq ON {0}_sense (ent_seq)",
+        "CREATE INDEX {0}_gloss_seq ON {0}_gloss (ent_seq)"
+    ],
+    'index': []
+}
+
+# full-text index over JMDict glosses, JMnedict translations & kanji meanings
+# src is the dataset name, and ref is the ent_seq or kanji id of the matching entry
+fts_schema = "CREATE VIRTUAL TABLE gloss_fts USING fts5(text, lang UNINDEXED, src UNINDEXED, ref UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+fts_sources = {
+    'jmdict': "INSERT INTO gloss_fts (text, lang, src, ref) SELECT gloss, lang, 'jmdict', ent_seq FROM jmdict_gloss",
+    'jmnedict': "INSERT INTO gloss_fts (text, lang, src, ref) SELECT gloss, lang, 'jmnedict', ent_seq FROM jmnedict_gloss",
+    'kanji': "INSERT INTO gloss_fts (text, lang, src, ref) SELECT meaning, lang, 'kanji', kanji_id FROM kanji_meaning"
+}
+
+# connection settings for bulk loading; with journaling & syncs disabled, a crash
+# during the build leaves a corrupt file, so the database is built under a temporary
+# name and only moved into place once complete
+load_pragmas = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144"
+]
+
+sqlite_rgx = re.compile(r'^sqlite://(?:/(.+))?$', re.I)
+
+
+def sqlite_path(uri):
+    """
+    return the database path for a sqlite:// URI; as with SQLAlchemy, the path is
+    relative after three slashes, and absolute after four
+    eg. sqlite:///edict.db => edict.db, sqlite:////data/edict.db => /data/edict.db
+    """
+    tpath = sqlite_rgx.match(uri).group(1)
+    if not tpath:
+        failwith(ER.OPT_BAD, "SQLite URI must include a path (sqlite:///path.db)")
+    return os.path.realpath(os.path.expanduser(tpath))
+
+
+class SqliteWriter(object):
+    """
+    Builds a read-only SQLite dictionary database from parsed Kanji, JMDict & JMnedict
+    entries; each call to write() inserts its entries in a single transaction. Secondary
+    indexes and the FTS5 gloss index are built by finish(), after all data is loaded
+
+    The database is written to <path>.tmp, then renamed to path when finish() is called,
+    replacing any existing database
+    """
+    fpath = None
+    tpath = None
+    conn = None
+    tables = []
+
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self.tpath = fpath + '.tmp'
+        self.tables = []
+
+        if os.path.exists(self.tpath):
+            os.unlink(self.tpath)
+        tdir = os.path.dirname(self.fpath)
+        if tdir and not os.path.exists(tdir):
+            os.makedirs(tdir)
+        try:
+            self.conn = sqlite3.connect(self.tpath)
+            for tq in load_pragmas:
+                self.conn.execute(tq)
+        except sqlite3.Error as e:
+            logexc(e, "Failed to create SQLite database")
+            failwith(ER.PROCFAIL, "Unable to open %s" % (self.tpath))
+
+    def create(self, name, kind='set'):
+        """
+        create the tables for dataset name ('kanji', 'jmdict' or 'jmnedict'), or for index
+        collection name if kind is 'index' (written to table idx_<name>)
+        Returns a function which converts an entry to a dict of table name => list of rows
+        """
+        if kind == 'index':
+            tname = 'idx_' + name
+            tschema = 'index'
+            rowfunc = lambda x: index_rows(x, tname)
+        elif name == 'kanji':
+            tname = tschema = 'kanji'
+            rowfunc = kanji_rows
+        else:
+            tname = name
+            tschema = 'jmdict'
+            rowfunc = lambda x: jmdict_rows(x, tname)
+        for tq in sql_schema[tschema]:
+            self.conn.execute(tq.format(tname))
+        self.tables.append((tname, tschema))
+        return rowfunc
+
+    def write(self, rowfunc, entries):
+        """insert the rows for each entry in entries, in a single transaction"""
+        rbuf = {}
+        for tent in entries:
+            for tt,trows in rowfunc(tent).iteritems():
+                rbuf.setdefault(tt, []).extend(trows)
+        self.flush(rbuf)
+
+    def flush(self, rbuf):
+        """insert all rows in rbuf (a dict of table name => list of rows) & commit"""
+        if not any(rbuf.values()):
+            return
+        try:
+            with self.conn:
+                for tt,trows in rbuf.iteritems():
+                    if trows:
+                        self.conn.executemany("INSERT OR REPLACE INTO %s VALUES (%s)" % (tt, ','.join('?' * len(trows[0]))), trows)
+        except sqlite3.Error as e:
+            logexc(e, "SQLite insert failed")
+            failwith(ER.PROCFAIL, "Failed to write to %s" % (self.tpath))
+
+    def finish(self):
+        """create secondary & full-text indexes, then move the database into place"""
+        tstart = time.time()
+        with self.conn:
+            for tname,tkind in self.tables:
+                for tq in sql_indexes[tkind]:
+                    self.conn.execute(tq.format(tname))
+        logthis("Created indexes in %0.2fs" % (time.time() - tstart),loglevel=LL.VERBOSE)
+
+        tstart = time.time()
+        with self.conn:
+            self.conn.execute(fts_schema)
+            for tname,tkind in self.tables:
+                if tname in fts_sources:
+                    self.conn.execute(fts_sources[tname])
+            self.conn.execute("INSERT INTO gloss_fts (gloss_fts) VALUES ('optimize')")
+        logthis("Built full-text index in %0.2fs" % (time.time() - tstart),loglevel=LL.VERBOSE)
+
+        # restore default journaling for readers, and collect planner statistics
+        self.conn.execute("ANALYZE")
+        self.conn.execute("PRAGMA journal_mode = DELETE")
+        self.conn.close()
+        self.conn = None
+        os.rename(self.tpath, self.fpath)
+        logthis("Wrote SQLite database",suffix=self.fpath,loglevel=LL.INFO)
+
+    def abort(self):
+        """close & remove the partially-written database"""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+        if os.path.exists(self.tpath):
+            os.unlink(self.tpath)
+
+
+def dumpdoc(entry):
+    return json.dumps(entry, ensure_ascii=False, separators=(',',':'))
+
+def intval(val):
+    """return val as an int, or None; lists use the first value (eg. stroke_count)"""
+    if isinstance(val, list):
+        val = val[0] if val else None
+    try:
+        return int(val)
+    except (TypeError, ValueError):
+        return None
+
+def keylist(val):
+    """return the keys of entity dict val (eg. pos, misc) as a comma-separated string, or None"""
+    return ','.join(sorted(val)) if val else None
+
+def langitems(val):
+    """yield (key, value) for dict val of key => value or list of values"""
+    for tk,tv in (val or {}).iteritems():
+        if isinstance(tv, list):
+            for x in tv:
+                yield tk, x
+        else:
+            yield tk, tv
+
+def kanji_rows(entry):
+    """return the rows for a KanjiDic2 entry"""
+    tid = entry['_id']
+    return {
+        'kanji': [ (tid, entry.get('kanji'), intval(entry.get('grade')), intval(entry.get('stroke_count')), intval(entry.get('freq')),
+                    intval(entry.get('jlpt')), intval((entry.get('radical') or {}).get('classical')), dumpdoc(entry)) ],
+        'kanji_reading': [ (tid, tk, tv) for tk,tv in langitems(entry.get('reading')) ],
+        'kanji_meaning': [ (tid, tk, tv) for tk,tv in langitems(entry.get('meaning')) ]
+    }
+
+def jmdict_rows(entry, name):
+    """return the rows for a JMDict or JMnedict entry, for tables prefixed with name"""
+    seq = int(entry['ent_seq'])
+    trows = {
+        name: [ (seq, entry.get('kf_pmax'), entry.get('rf_pmax'), dumpdoc(entry)) ],
+        name + '_kanji': [ (seq, i, x['keb'], ','.join(x.get('ke_pri', ())) or None) for i,x in enumerate(entry.get('k_ele', ())) ],
+        name + '_reading': [ (seq, i, x['reb'], ','.join(x.get('re_pri', ())) or None) for i,x in enumerate(entry.get('r_ele', ())) ],
+        name + '_sense': [],
+        name + '_gloss': []
+    }
+    if 'trans' in entry:
+        for i,tt in enumerate(entry['trans']):
+            trows[name + '_sense'].append((seq, i, None, ','.join(tt.get('name_type', ())) or None, None))
+            trows[name + '_gloss'].extend([ (seq, i, tk, tv) for tk,tv in langitems(tt.get('trans_det')) ])
+    else:
+        for i,ts in enumerate(entry.get('sense', ())):
+            trows[name + '_sense'].append((seq, i, keylist(ts.get('pos')), keylist(ts.get('misc')), keylist(ts.get('field'))))
+            trows[name + '_gloss'].extend([ (seq, i, tk, tv) for tk,tv in langitems(ts.get('gloss')) ])
+    return trows
+
+def index_rows(doc, name):
+    """return the row for an index document, for table name"""
+    return { name: [ (unicode(doc['_id']), dumpdoc(doc)) ] }